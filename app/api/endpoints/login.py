@@ -7,9 +7,9 @@ from app.api.vo.system.user import CreateUser
 from app.core import security
 from app.core.db import AsyncSessionDep
 from app.core.logger import LoggerDep
-from app.core.security import verify_password,create_tokens
+from app.core.security import verify_password_async,create_tokens
 from app.models.common import Token
-from app.models.system import UserModel, TenantModel
+from app.models.system import UserDeptModel, UserModel, TenantModel
 from app.utils.response import error_response, success_response
 from app.core.system_context import SystemContext
 from typing import Optional
@@ -21,10 +21,18 @@ router = APIRouter(tags=["认证授权"])
 async def login_access_token(
     session: AsyncSessionDep,
     logger: LoggerDep, 
-    form_data: OAuth2PasswordRequestForm = Depends()
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-ID")
 ):
     """一个符合 OAuth2 标准的令牌登录端点，用于获取后续请求所需的访问令牌"""
     
+    # 指定租户时在该租户所在分库中查找用户
+    if x_tenant_id:
+        try:
+            SystemContext.set_tenant_id(int(x_tenant_id))
+        except ValueError:
+            return error_response("无效的租户ID格式")
+    
     # 构建查询条件
     query = select(UserModel).where(UserModel.username == form_data.username)
     
@@ -33,12 +41,15 @@ async def login_access_token(
     
     if not user:
         return error_response("用户不存在")
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         return error_response("用户名或密码错误")
     
     # 验证租户状态
     if user.tenant_id:
-        tenant_result = await session.execute(select(TenantModel).where(TenantModel.id == user.tenant_id))
+        # 租户表本身不按租户过滤
+        tenant_result = await session.execute(
+            select(TenantModel).where(TenantModel.id == user.tenant_id).execution_options(all_tenants=True)
+        )
         tenant = tenant_result.scalar_one_or_none()
         if not tenant or tenant.status != 0:
             return error_response("租户已被禁用")
@@ -61,8 +72,8 @@ async def create_user(
     """
     注册新用户
     """
-    # 构建查询条件
-    query = select(UserModel).where(UserModel.username == user_in.username)
+    # 构建查询条件（逻辑删除的账号同样占用）
+    query = select(UserModel).where(UserModel.username == user_in.username).execution_options(include_deleted=True)
     
     # 如果提供了租户ID，添加租户过滤条件
     if x_tenant_id:
@@ -77,17 +88,22 @@ async def create_user(
     if user:
         return error_response("用户已存在")
     
-    user = UserModel(**user_in.model_dump(exclude={"role_ids"}))
-    user.password = security.get_password_hash(user.password)
+    user = UserModel(**user_in.model_dump(exclude={"role_ids", "dept_ids"}))
+    user.password = await security.get_password_hash_async(user.password)
     
     # 设置租户ID
     if x_tenant_id:
         user.tenant_id = int(x_tenant_id)
     
     session.add(user)
+    await session.flush()
+    session.add_all(
+        UserDeptModel(tenant_id=user.tenant_id, user_id=user.id, dept_id=dept_id)
+        for dept_id in dict.fromkeys(user_in.dept_ids or [])
+    )
     await session.commit()
     await session.refresh(user)
-    return success_response(user)
+    return success_response({**user.model_dump(), "dept_ids": list(dict.fromkeys(user_in.dept_ids or []))})
 
 @router.post("/refresh", description="使用刷新令牌获取新的访问令牌")
 async def refresh_token(
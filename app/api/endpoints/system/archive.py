@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Body, Query
+from app.api.vo.system.archive import RestoreArchived
+from app.core.archive import archive_job, list_archived, restore_archived
+from app.core.deps import CurrentUser, require_permission
+from app.core.system_context import SystemContext
+from app.models.common import BasePageQuery
+from app.utils.response import error_response, success_response
+
+router = APIRouter(prefix="/archive", tags=["数据归档"])
+
+
+@router.get("/status", summary="归档任务状态")
+@require_permission("system:archive:list")
+async def archive_status(
+    current_user: CurrentUser,
+):
+    """是否正在执行、当前进度及各表归档行数"""
+    return success_response(archive_job.status())
+
+
+@router.post("/run", summary="立即执行归档")
+@require_permission("system:archive:run")
+async def run_archive(
+    current_user: CurrentUser,
+):
+    """立即归档逻辑删除超过保留天数的记录，返回各表归档行数"""
+    try:
+        result = await archive_job.run()
+    except ValueError as e:
+        return error_response(str(e))
+    return success_response(result)
+
+
+@router.get("/{table}", summary="归档记录分页查询")
+@require_permission("system:archive:list")
+async def query_archived(
+    current_user: CurrentUser,
+    table: str,
+    page_query: BasePageQuery = Query(..., description="查询参数"),
+):
+    try:
+        result = await list_archived(table, SystemContext.get_tenant_id(), page_query)
+    except ValueError as e:
+        return error_response(str(e))
+    return success_response(result)
+
+
+@router.post("/restore", summary="恢复归档记录")
+@require_permission("system:archive:restore")
+async def restore(
+    current_user: CurrentUser,
+    data: RestoreArchived = Body(...),
+):
+    """将归档记录移回原表并取消逻辑删除，关联记录一并恢复"""
+    try:
+        result = await restore_archived(data.table, data.id, SystemContext.get_tenant_id())
+    except ValueError as e:
+        return error_response(str(e))
+    return success_response(result)
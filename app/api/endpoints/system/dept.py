@@ -5,8 +5,8 @@ from typing import List
 import json
 from app.api.vo.system.dept import CreateDept, UpdateDept
 
-from fastapi import APIRouter, Body, Depends
-from app.api.vo.system.dept import CreateDept, UpdateDept, RemoveDeptMember
+from fastapi import APIRouter, Body, Depends, Query
+from app.api.vo.system.dept import DeptListQuery, CreateDept, UpdateDept, RemoveDeptMember
 
 from app.core.db import AsyncSessionDep
 from app.core.deps import CurrentUser, require_permission
@@ -14,7 +14,7 @@ from app.core.logger import LoggerDep
 from app.models.system import DeptModel
 from app.services.system.dept import DeptService
 from app.services.system.user import UserService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 
 router = APIRouter(prefix="/dept", tags=["部门管理"])
 
@@ -42,8 +42,9 @@ async def tree_depts(
 async def list_depts(
     current_user: CurrentUser,
     service: DeptService = Depends(get_dept_service),
+    list_query: DeptListQuery = Query(..., description="查询参数"),
 ):
-    result = await service.lists()
+    result = await service.lists(list_query.fields)
     return success_response(result)
 
 @router.get("/{id}/users", summary="获取部门成员列表")
@@ -51,10 +52,11 @@ async def list_depts(
 async def list_dept_users(
     current_user: CurrentUser,
     id: int,
+    include_children: bool = False,
     service: UserService = Depends(get_user_service),
 ):
-    """根据部门ID获取部门成员列表"""
-    result = await service.get_users_by_dept_id(id)
+    """根据部门ID获取部门成员列表，include_children=true 时包含所有下级部门的成员"""
+    result = await service.get_users_by_dept_id(id, include_children)
     return success_response(result)
 
 @router.post("/remove-member", summary="移除部门成员")
@@ -93,7 +95,10 @@ async def update_dept(
 ):
     if not dept.pid:
         dept.pid = 0
-    result = await service.update_dept(dept.model_dump())
+    try:
+        result = await service.update_dept(dept.model_dump())
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="部门删除")
@@ -5,7 +5,7 @@ from app.core.deps import CurrentUser, require_permission
 from app.core.logger import LoggerDep
 from app.models.system import PermissionModel
 from app.services.system.menu import MenuService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 
 router = APIRouter(prefix="/menu", tags=["菜单管理"])
 
@@ -45,7 +45,10 @@ async def update_menu(
 ):
     if not menu.pid:
         menu.pid = 0
-    result = await service.update_menu(menu.model_dump())
+    try:
+        result = await service.update_menu(menu.model_dump())
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="菜单删除")
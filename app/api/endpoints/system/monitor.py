@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from app.core.db import async_db
+from app.core.deps import CurrentUser, require_permission
+from app.core.metrics import pool_metrics, statement_cache_metrics
+from app.core.permission import permission_cache
+from app.core.principal import principal_cache
+from app.core.security import access_token_cache, password_hash_pool
+from app.utils.pagination import count_cache
+from app.utils.response import success_response
+
+router = APIRouter(prefix="/monitor", tags=["系统监控"])
+
+
+@router.get("/db", summary="数据库语句缓存、只读副本及分库状态")
+@require_permission("system:monitor:db")
+async def db_stats(
+    current_user: CurrentUser,
+):
+    """SQLAlchemy 编译缓存与 asyncpg 预编译语句缓存的容量及命中情况，以及只读副本健康状态与分库映射"""
+    stats = statement_cache_metrics.snapshot(async_db.async_engine)
+    stats["replicas"] = async_db.replica_status()
+    stats["shards"] = async_db.shard_status()
+    return success_response(stats)
+
+
+@router.get("/pool", summary="数据库连接池统计")
+@require_permission("system:monitor:pool")
+async def pool_stats(
+    current_user: CurrentUser,
+):
+    """各连接池（主库、只读副本、分库）的借出等待直方图、占用/空闲/溢出连接数及连接寿命"""
+    return success_response(pool_metrics.snapshot())
+
+
+@router.get("/cache", summary="进程内缓存统计")
+@require_permission("system:monitor:cache")
+async def cache_stats(
+    current_user: CurrentUser,
+):
+    """权限、令牌、用户快照、分页总数缓存及密码哈希执行池的统计信息"""
+    return success_response({
+        "permission": permission_cache.stats(),
+        "access_token": access_token_cache.stats(),
+        "principal": principal_cache.stats(),
+        "count": count_cache.stats(),
+        "password_hash_pool": password_hash_pool.stats(),
+    })
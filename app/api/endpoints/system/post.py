@@ -6,7 +6,7 @@ from app.core.deps import CurrentUser, require_permission
 from app.core.logger import LoggerDep
 from app.models.system import PostModel
 from app.services.system.post import PostService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 
 router = APIRouter(prefix="/post", tags=["岗位管理"])
 
@@ -41,7 +41,10 @@ async def update_post(
     post: UpdatePost = Body(...),
     service: PostService = Depends(get_post_service),
 ):
-    result = await service.update_post(post.model_dump())
+    try:
+        result = await service.update_post(post.model_dump())
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="岗位删除")
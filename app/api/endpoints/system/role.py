@@ -5,7 +5,7 @@ from app.core.deps import CurrentUser, require_permission
 from app.core.logger import LoggerDep
 from app.models.system import RoleModel
 from app.services.system.role import RoleService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 
 router = APIRouter(prefix="/role", tags=["角色管理"])
 
@@ -48,7 +48,10 @@ async def update_role(
     role: UpdateRole = Body(...),
     service: RoleService = Depends(get_role_service),
     ):
-    result = await service.update_role(role.model_dump(exclude={"menu_ids"}), role.menu_ids)
+    try:
+        result = await service.update_role(role.model_dump(exclude={"menu_ids"}), role.menu_ids)
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="角色删除")
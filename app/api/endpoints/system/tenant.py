@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Body, Depends, Query
-from app.api.vo.system.tenant import TenantPageQuery, CreateTenant, UpdateTenant
+from app.api.vo.system.tenant import MoveTenantShard, TenantListQuery, TenantPageQuery, CreateTenant, UpdateTenant
 from app.core.db import AsyncSessionDep
 from app.core.deps import CurrentUser
 from app.core.logger import LoggerDep
 from app.models.system import TenantModel
 from app.services.system.tenant import TenantService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 from app.core.deps import require_permission
 
 router = APIRouter(prefix="/tenant", tags=["租户管理"])
@@ -19,8 +19,9 @@ async def get_tenant_service(session: AsyncSessionDep, logger: LoggerDep) -> Ten
 async def list_tenants(
     current_user: CurrentUser,
     service: TenantService = Depends(get_tenant_service),
+    list_query: TenantListQuery = Query(..., description="查询参数"),
 ):
-    return success_response(await service.lists())
+    return success_response(await service.lists(list_query.fields))
 
 @router.get("/page", summary="分页查询")
 @require_permission("system:tenant:list")
@@ -50,7 +51,24 @@ async def update_tenant(
     tenant: UpdateTenant = Body(...),
     service: TenantService = Depends(get_tenant_service),
 ):
-    result = await service.update_tenant(tenant.model_dump())
+    try:
+        result = await service.update_tenant(tenant.model_dump())
+    except ValueError as e:
+        return error_response(str(e))
+    return success_response(result)
+
+@router.post("/move-shard", summary="迁移租户分库")
+@require_permission("system:tenant:shard")
+async def move_tenant_shard(
+    current_user: CurrentUser,
+    move: MoveTenantShard = Body(...),
+    service: TenantService = Depends(get_tenant_service),
+):
+    """将租户数据分批复制到目标分库并切换映射（需先停用租户）"""
+    try:
+        result = await service.move_to_shard(move.id, move.shard)
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="租户删除")
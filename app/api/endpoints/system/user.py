@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Body, Depends, Query
-from app.api.vo.system.user import UserPageQuery, CreateUser, UpdateUser, ResetPassword, UpdateStatus
+from app.api.vo.system.user import UserListQuery, UserPageQuery, BatchCreateUser, CreateUser, UpdateUser, ResetPassword, UpdateStatus
 from app.core.db import AsyncSessionDep
 from app.core.deps import CurrentUser
 from app.core.logger import LoggerDep
 from app.models.system import UserModel
 from app.services.system.user import UserService
-from app.utils.response import success_response
+from app.utils.response import error_response, success_response
 from app.core.deps import require_permission
 
 router = APIRouter(prefix="/user", tags=["用户管理"])
@@ -19,8 +19,9 @@ async def get_user_service(session: AsyncSessionDep, logger: LoggerDep) -> UserS
 async def list_users(
     current_user: CurrentUser,
     service: UserService = Depends(get_user_service),
+    list_query: UserListQuery = Query(..., description="查询参数"),
 ):
-    return success_response(await service.lists())
+    return success_response(await service.lists(list_query.fields))
 
 @router.get("/page", summary="分页查询")
 @require_permission("system:user:list")
@@ -39,10 +40,23 @@ async def create_user(
     user: CreateUser = Body(...),
     service: UserService = Depends(get_user_service),
 ):
-    user_model = UserModel(**user.model_dump(exclude={"role_ids"}))
-    result = await service.create_user(user_model,user.role_ids)
+    user_model = UserModel(**user.model_dump(exclude={"role_ids", "dept_ids"}))
+    try:
+        result = await service.create_user(user_model,user.role_ids,user.dept_ids)
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
+@router.post("/batch-create", summary="批量新增用户")
+@require_permission("system:user:create")
+async def batch_create_users(
+    current_user: CurrentUser,
+    data: BatchCreateUser = Body(...),
+    service: UserService = Depends(get_user_service),
+):
+    """逐行返回创建结果，部分失败时其余用户照常创建"""
+    return success_response(await service.batch_create_users(data.users))
+
 @router.put("/reset-password", summary="重置用户密码")
 @require_permission("system:user:update")
 async def reset_password(
@@ -83,8 +97,12 @@ async def update_user(
         "dept_ids": user_info.get("dept_ids",[]),
         "post_id": user_info.get("post_id",0),
         "status": user_info.get("status",0),
+        "version": user_info.get("version"),
     }
-    result = await service.update_user(user_dict, user_info.get("role_ids",[]))
+    try:
+        result = await service.update_user(user_dict, user_info.get("role_ids",[]))
+    except ValueError as e:
+        return error_response(str(e))
     return success_response(result)
 
 @router.delete("/{id}", summary="用户删除")
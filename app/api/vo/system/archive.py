@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from sqlmodel import Field
+
+
+class RestoreArchived(BaseModel):
+    """恢复归档记录DTO"""
+    table: str = Field(description="原表名(sys_user/sys_role/sys_perm/sys_dept/sys_post)")
+    id: int = Field(description="记录ID")
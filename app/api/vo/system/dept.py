@@ -3,7 +3,11 @@
 from typing import Optional, List
 from pydantic import BaseModel
 from sqlmodel import Field
-from app.models.common import BasePageQuery
+from app.models.common import BasePageQuery, FieldsQuery
+from app.utils.fieldsets import BASE_FIELDS
+
+# 列表可通过 fields 选择的列
+DEPT_FIELDS = (*BASE_FIELDS, "name", "remark", "pid", "level", "leader", "phone", "email", "sort", "status", "version")
 
 class DeptBase(BaseModel):
     """部门基础字段"""
@@ -17,6 +21,10 @@ class DeptBase(BaseModel):
     sort: int = Field(default=0, description="排序")
     status: int = Field(default=0, description="状态(0:正常 1:禁用)")
 
+class DeptListQuery(FieldsQuery):
+    """部门列表查询DTO"""
+    FIELDS = DEPT_FIELDS
+
 class CreateDept(DeptBase):
     """创建部门DTO"""
     pass
@@ -24,6 +32,7 @@ class CreateDept(DeptBase):
 class UpdateDept(DeptBase):
     """更新部门DTO"""
     id: int = Field(description="部门ID")
+    version: Optional[int] = Field(default=None, description="版本号（乐观锁，传入时仅在未被修改时更新）")
 
 class DeptResponse(DeptBase):
     """部门响应DTO"""
@@ -28,6 +28,7 @@ class CreateMenu(MenuBase):
 class UpdateMenu(MenuBase):
     """更新菜单DTO"""
     id: int = Field(description="菜单ID")
+    version: Optional[int] = Field(default=None, description="版本号（乐观锁，传入时仅在未被修改时更新）")
 
 class MenuResponse(MenuBase):
     """菜单响应DTO"""
@@ -17,6 +17,7 @@ class CreatePost(PostBase):
 class UpdatePost(PostBase):
     """更新岗位DTO"""
     id: int = Field(description="岗位ID")
+    version: Optional[int] = Field(default=None, description="版本号（乐观锁，传入时仅在未被修改时更新）")
 
 class PostResponse(PostBase):
     """岗位响应DTO"""
@@ -3,6 +3,10 @@ from typing import Optional
 from pydantic import BaseModel
 from sqlmodel import Field, SQLModel
 from app.models.common import BasePageQuery
+from app.utils.fieldsets import BASE_FIELDS
+
+# 列表/分页可通过 fields 选择的列
+ROLE_FIELDS = (*BASE_FIELDS, "name", "remark", "status", "version")
 
 class RoleBase(BaseModel):
     """角色基础字段"""
@@ -19,6 +23,7 @@ class UpdateRole(RoleBase):
     """更新角色DTO"""
     id: int = Field(description="角色ID")
     menu_ids: Optional[list[int]] = Field(default_factory=list, description="菜单ID列表")
+    version: Optional[int] = Field(default=None, description="版本号（乐观锁，传入时仅在未被修改时更新）")
 
 class RoleResponse(RoleBase):
     """角色响应DTO"""
@@ -26,4 +31,5 @@ class RoleResponse(RoleBase):
 
 class RolePageQuery(BasePageQuery):
     """分页查询角色DTO"""
+    FIELDS = ROLE_FIELDS
     name: Optional[str] = Field(None, description="角色名称")
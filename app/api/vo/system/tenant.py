@@ -1,7 +1,14 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from app.models.common import BasePageQuery
+from app.models.common import BasePageQuery, FieldsQuery
+from app.utils.fieldsets import BASE_FIELDS
+
+# 列表/分页可通过 fields 选择的列
+TENANT_FIELDS = (
+    *BASE_FIELDS, "name", "code", "domain", "contact_name", "contact_phone", "contact_email",
+    "status", "remark", "expire_time", "version",
+)
 
 
 class TenantBase(BaseModel):
@@ -25,10 +32,23 @@ class CreateTenant(TenantBase):
 class UpdateTenant(TenantBase):
     """更新租户"""
     id: int
+    version: Optional[int] = None  # 版本号（乐观锁），传入时仅在未被修改时更新
+
+
+class MoveTenantShard(BaseModel):
+    """迁移租户分库"""
+    id: int
+    shard: str
+
+
+class TenantListQuery(FieldsQuery):
+    """租户列表查询"""
+    FIELDS = TENANT_FIELDS
 
 
 class TenantPageQuery(BasePageQuery):
     """租户分页查询"""
+    FIELDS = TENANT_FIELDS
     name: Optional[str] = None
     code: Optional[str] = None
     status: Optional[int] = None
@@ -1,7 +1,11 @@
 from typing import Optional, List
 from pydantic import BaseModel
 from sqlmodel import Field
-from app.models.common import BasePageQuery
+from app.models.common import BasePageQuery, FieldsQuery
+from app.utils.fieldsets import BASE_FIELDS
+
+# 列表/分页可通过 fields 选择的列（不含密码）
+USER_FIELDS = (*BASE_FIELDS, "username", "nickname", "avatar", "email", "phone", "status", "post_id", "version")
 
 class UserBase(BaseModel):
     """用户基础字段"""
@@ -19,6 +23,10 @@ class CreateUser(UserBase):
     """创建用户DTO"""
     role_ids: Optional[List[int]] = Field(None, description="选择角色列表")
 
+class BatchCreateUser(BaseModel):
+    """批量创建用户DTO"""
+    users: List[CreateUser] = Field(..., min_length=1, max_length=10000, description="用户列表")
+
 class UpdateUser(UserBase):
     """更新用户DTO"""
     id: int = Field(description="用户ID")
@@ -33,8 +41,13 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserListQuery(FieldsQuery):
+    """用户列表查询DTO"""
+    FIELDS = USER_FIELDS
+
 class UserPageQuery(BasePageQuery):
     """分页查询用户DTO"""
+    FIELDS = USER_FIELDS
     username: Optional[str] = Field(None, description="账号")
     nickname: Optional[str] = Field(None, description="昵称/姓名")
     status: Optional[int] = Field(None, description="状态(0:正常 1:禁用)")
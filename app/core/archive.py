@@ -0,0 +1,240 @@
+"""
+逻辑删除数据归档
+- 后台任务定期将逻辑删除超过 archive_after_days 天的记录（以 update_time 作为删除时间）
+  连同其关联表记录移入 *_archive 表，使热表只保留在用数据
+- 每批 archive_batch_size 行一个事务，批次间暂停 archive_batch_pause 秒；仍被其他在用记录引用的行
+  （如仍有用户关联的岗位）暂不归档
+- 多进程部署时通过咨询锁保证同一库同一时刻只有一个进程执行
+- restore_archived 将归档记录移回原表并取消逻辑删除，关联记录在另一端仍在原表时一并恢复
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Table, delete, exists, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.core.db import async_db
+from app.core.logger import logger
+from app.core.migrations import advisory_lock
+from app.core.permission import permission_cache
+from app.core.shard import PRIMARY_SHARD
+from app.models.archive import ARCHIVE_LINKS, ARCHIVE_TABLES
+from app.models.common import BasePageQuery, PageResponse
+from app.utils.pagination import invalidate_counts
+
+ARCHIVE_LOCK = "zeno:archive"
+ARCHIVE_LOCK_TIMEOUT = 1  # 其他进程正在归档时仅短暂等待，获取失败则跳过本轮
+
+# 归档列表中不返回的列
+HIDDEN_COLUMNS = {"password"}
+
+ARCHIVE_MODELS = {model.__tablename__: model for model in ARCHIVE_LINKS}
+
+
+def _blocking_references(model) -> List:
+    """引用该表且不随之归档的外键列（如 sys_user.post_id），被引用的行暂不归档"""
+    table = model.__table__
+    links = {link.__tablename__ for link, _ in ARCHIVE_LINKS[model]}
+    return [
+        fk.parent
+        for other in SQLModel.metadata.tables.values()
+        if other.name not in links and other.name not in {t.name for t in ARCHIVE_TABLES.values()}
+        for fk in other.foreign_keys
+        if fk.column is table.c.id
+    ]
+
+
+async def _move(conn: AsyncConnection, source: Table, target: Table, condition, values: dict) -> int:
+    """将满足条件的行从 source 移到 target（附加 values 中的列值，忽略 target 没有的列），返回行数"""
+    rows = (await conn.execute(select(source).where(condition))).mappings().all()
+    if not rows:
+        return 0
+    await conn.execute(insert(target), [
+        {key: value for key, value in {**row, **values}.items() if key in target.c} for row in rows
+    ])
+    await conn.execute(delete(source).where(source.c.id.in_([row["id"] for row in rows])))
+    return len(rows)
+
+
+async def archive_batch(engine: AsyncEngine, model, cutoff: datetime, batch_size: int) -> Dict[str, int]:
+    """单个事务内归档一批逻辑删除的记录及其关联记录，返回各表归档行数（无可归档记录时为空）"""
+    table = model.__table__
+    guards = [~exists().where(column == table.c.id) for column in _blocking_references(model)]
+    sql = (
+        select(table.c.id)
+        .where(table.c.deleted == 1, table.c.update_time < cutoff, *guards)
+        .order_by(table.c.id)
+        .limit(batch_size)
+        .with_for_update()
+    )
+    moved: Dict[str, int] = {}
+    async with engine.begin() as conn:
+        ids = (await conn.execute(sql)).scalars().all()
+        if not ids:
+            return moved
+        values = {"archived_at": datetime.now()}
+        # 先移关联表（外键依赖主表）
+        for link, column in ARCHIVE_LINKS[model]:
+            link_table = link.__table__
+            moved[link_table.name] = await _move(
+                conn, link_table, ARCHIVE_TABLES[link_table.name], link_table.c[column].in_(ids), values
+            )
+        moved[table.name] = await _move(conn, table, ARCHIVE_TABLES[table.name], table.c.id.in_(ids), values)
+    return moved
+
+
+class ArchiveJob:
+    """后台归档任务，记录执行进度及归档行数"""
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.current: Optional[str] = None  # 正在归档的 分库/表
+        self.last_started: Optional[datetime] = None
+        self.last_finished: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_moved: Dict[str, int] = {}
+        self.total_moved: Dict[str, int] = defaultdict(int)
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def start(self) -> None:
+        if settings.archive_enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.archive_interval)
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error("逻辑删除数据归档失败: {}", e)
+
+    async def run(self) -> Dict[str, int]:
+        """执行一轮归档（主库及各分库），返回各表归档行数"""
+        if self.running:
+            raise ValueError("归档任务正在执行")
+        async with self._lock:
+            self.last_started, self.last_error, self.last_moved = datetime.now(), None, {}
+            cutoff = datetime.now() - timedelta(days=settings.archive_after_days)
+            try:
+                for shard in [PRIMARY_SHARD, *settings.shard_dsns]:
+                    await self._run_shard(shard, async_db.get_shard_engine(shard), cutoff)
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            finally:
+                self.current = None
+                self.last_finished = datetime.now()
+            logger.info("逻辑删除数据归档完成: {}", self.last_moved or "无可归档记录")
+            return self.last_moved
+
+    async def _run_shard(self, shard: str, engine: AsyncEngine, cutoff: datetime) -> None:
+        async with engine.connect() as lock_conn:
+            try:
+                async with advisory_lock(lock_conn, ARCHIVE_LOCK, ARCHIVE_LOCK_TIMEOUT):
+                    for model in ARCHIVE_LINKS:
+                        self.current = f"{shard}/{model.__tablename__}"
+                        while True:
+                            moved = await archive_batch(engine, model, cutoff, settings.archive_batch_size)
+                            if not moved:
+                                break
+                            for name, count in moved.items():
+                                self.last_moved[name] = self.last_moved.get(name, 0) + count
+                                self.total_moved[name] += count
+                            logger.info("归档 [{}] {}: {}", shard, model.__tablename__, moved)
+                            if moved[model.__tablename__] < settings.archive_batch_size:
+                                break
+                            await asyncio.sleep(settings.archive_batch_pause)
+            except TimeoutError:
+                logger.info("[{}] 其他进程正在执行归档，跳过", shard)
+
+    def status(self) -> dict:
+        return {
+            "enabled": settings.archive_enabled,
+            "after_days": settings.archive_after_days,
+            "running": self.running,
+            "current": self.current,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_error": self.last_error,
+            "last_moved": self.last_moved,
+            "total_moved": dict(self.total_moved),
+        }
+
+
+archive_job = ArchiveJob()
+
+
+def _archive_model(table_name: str):
+    model = ARCHIVE_MODELS.get(table_name)
+    if model is None:
+        raise ValueError(f"不支持归档的表: {table_name}")
+    return model
+
+
+async def list_archived(table_name: str, tenant_id: Optional[int], page_query: BasePageQuery) -> PageResponse[dict]:
+    """分页查询租户的归档记录（按归档时间倒序）"""
+    _archive_model(table_name)
+    archive = ARCHIVE_TABLES[table_name]
+    condition = [archive.c.tenant_id == tenant_id] if tenant_id is not None else []
+    columns = [column for column in archive.c if column.name not in HIDDEN_COLUMNS]
+    engine = async_db.get_shard_engine(async_db.shard_map.shard_for(tenant_id))
+    async with engine.connect() as conn:
+        total = await conn.scalar(select(func.count()).select_from(archive).where(*condition))
+        sql = (
+            select(*columns).where(*condition)
+            .order_by(archive.c.archived_at.desc(), archive.c.id.desc())
+            .offset(page_query.offset).limit(page_query.limit)
+        )
+        items = [dict(row) for row in (await conn.execute(sql)).mappings()]
+    return PageResponse(page_num=page_query.page_num, page_size=page_query.page_size, total=total, items=items)
+
+
+async def restore_archived(table_name: str, id: int, tenant_id: Optional[int]) -> Dict[str, int]:
+    """将归档记录移回原表并取消逻辑删除，返回各表恢复行数"""
+    model = _archive_model(table_name)
+    table, archive = model.__table__, ARCHIVE_TABLES[table_name]
+    engine = async_db.get_shard_engine(async_db.shard_map.shard_for(tenant_id))
+    restored: Dict[str, int] = {}
+    async with engine.begin() as conn:
+        condition = [archive.c.id == id]
+        if tenant_id is not None:
+            condition.append(archive.c.tenant_id == tenant_id)
+        row = (await conn.execute(select(archive).where(*condition))).mappings().first()
+        if row is None:
+            raise ValueError("归档记录不存在")
+        # 外键引用的记录需在原表中（如用户的岗位已归档时需先恢复岗位）
+        for fk in table.foreign_keys:
+            value = row[fk.parent.name]
+            if value is not None and not await conn.scalar(select(fk.column).where(fk.column == value)):
+                raise ValueError(f"关联记录 {fk.column.table.name}#{value} 不存在或已归档，请先恢复")
+        values = {key: value for key, value in row.items() if key in table.c}
+        try:
+            await conn.execute(insert(table).values({**values, "deleted": 0, "update_time": datetime.now()}))
+        except IntegrityError as e:
+            raise ValueError("恢复失败: 唯一字段冲突（如账号已被占用）") from e
+        await conn.execute(delete(archive).where(archive.c.id == id))
+        restored[table.name] = 1
+
+        # 关联记录: 另一端仍在原表时恢复，否则留在归档表中待另一端恢复
+        for link, column in ARCHIVE_LINKS[model]:
+            link_table, link_archive = link.__table__, ARCHIVE_TABLES[link.__tablename__]
+            other = next(fk for fk in link_table.foreign_keys if fk.parent.name not in (column, "tenant_id"))
+            condition = (link_archive.c[column] == id) & exists().where(other.column == link_archive.c[other.parent.name])
+            restored[link_table.name] = await _move(conn, link_archive, link_table, condition, {})
+    invalidate_counts(table_name, row["tenant_id"])
+    permission_cache.invalidate_tenant(row["tenant_id"])
+    return restored
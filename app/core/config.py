@@ -2,7 +2,7 @@ from pathlib import Path
 from pydantic import Field, MySQLDsn,PostgresDsn, computed_field
 import yaml
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 def load_config() -> Dict[str, Any]:
     """加载并返回配置字典"""
@@ -24,6 +24,20 @@ def load_config() -> Dict[str, Any]:
 # 全局配置对象
 CONFIG = load_config()
 
+
+def build_dsn(source: Dict[str, Any]) -> str:
+    """根据数据源配置拼接连接地址"""
+    schema=source.get("schema")
+    username=source.get("user")
+    password=source.get("password")
+    host=source.get("host")
+    port=source.get("port")
+    database=source.get('database')
+    if schema and schema.startswith("sqlite"):
+        # SQLite 只需数据库文件路径，如 sqlite+aiosqlite:///data/app.db
+        return f"{schema}:///{database}"
+    return f"{schema}://{username}:{password}@{host}:{port}/{database}"
+
 from pydantic_settings import BaseSettings
 
 
@@ -52,17 +66,166 @@ class Settings(BaseSettings):
         default=CONFIG.get("api", {}).get("v1_str"),
         env="API_V1_STR"
     )
+    # 缓存配置
+    permission_cache_size: int = Field(
+        default=CONFIG.get("cache", {}).get("permission", {}).get("max_size", 10000),
+        env="PERMISSION_CACHE_SIZE",
+    )
+    permission_cache_ttl: int = Field(
+        default=CONFIG.get("cache", {}).get("permission", {}).get("ttl", 300),
+        env="PERMISSION_CACHE_TTL",
+    )
+    token_cache_size: int = Field(
+        default=CONFIG.get("cache", {}).get("token", {}).get("max_size", 10000),
+        env="TOKEN_CACHE_SIZE",
+    )
+    principal_cache_size: int = Field(
+        default=CONFIG.get("cache", {}).get("principal", {}).get("max_size", 10000),
+        env="PRINCIPAL_CACHE_SIZE",
+    )
+    principal_cache_ttl: int = Field(
+        default=CONFIG.get("cache", {}).get("principal", {}).get("ttl", 30),
+        env="PRINCIPAL_CACHE_TTL",
+    )
+    count_cache_size: int = Field(
+        default=CONFIG.get("cache", {}).get("count", {}).get("max_size", 10000),
+        env="COUNT_CACHE_SIZE",
+    )
+    count_cache_ttl: int = Field(
+        default=CONFIG.get("cache", {}).get("count", {}).get("ttl", 60),
+        env="COUNT_CACHE_TTL",
+    )
+    # 逻辑删除数据归档配置
+    archive_enabled: bool = Field(
+        default=CONFIG.get("archive", {}).get("enabled", True),
+        env="ARCHIVE_ENABLED",
+    )
+    archive_after_days: int = Field(
+        default=CONFIG.get("archive", {}).get("after_days", 30),
+        env="ARCHIVE_AFTER_DAYS",
+    )  # 逻辑删除超过该天数后归档
+    archive_interval: int = Field(
+        default=CONFIG.get("archive", {}).get("interval", 3600),
+        env="ARCHIVE_INTERVAL",
+    )  # 后台归档间隔（秒）
+    archive_batch_size: int = Field(
+        default=CONFIG.get("archive", {}).get("batch_size", 500),
+        env="ARCHIVE_BATCH_SIZE",
+    )
+    archive_batch_pause: float = Field(
+        default=CONFIG.get("archive", {}).get("batch_pause", 0.1),
+        env="ARCHIVE_BATCH_PAUSE",
+    )  # 批次间暂停（秒）
+    # 密码哈希线程/进程池配置
+    password_hash_executor: str = Field(
+        default=CONFIG.get("security", {}).get("password_hash", {}).get("executor", "thread"),
+        env="PASSWORD_HASH_EXECUTOR",
+    )  # thread 或 process
+    password_hash_workers: int = Field(
+        default=CONFIG.get("security", {}).get("password_hash", {}).get("workers", 4),
+        env="PASSWORD_HASH_WORKERS",
+    )
+    password_hash_max_concurrency: int = Field(
+        default=CONFIG.get("security", {}).get("password_hash", {}).get("max_concurrency", 8),
+        env="PASSWORD_HASH_MAX_CONCURRENCY",
+    )
+    # 数据库引擎配置
+    db_query_cache_size: int = Field(
+        default=CONFIG.get("database", {}).get("query_cache_size", 500),
+        env="DB_QUERY_CACHE_SIZE",
+    )
+    db_prepared_statement_cache_size: int = Field(
+        default=CONFIG.get("database", {}).get("prepared_statement_cache_size", 100),
+        env="DB_PREPARED_STATEMENT_CACHE_SIZE",
+    )
+    db_echo: bool = Field(default=CONFIG.get("database", {}).get("echo", False), env="DB_ECHO")
+    db_pool_size: int = Field(default=CONFIG.get("database", {}).get("pool_size", 10), env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=CONFIG.get("database", {}).get("max_overflow", 5), env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(default=CONFIG.get("database", {}).get("pool_timeout", 30), env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=CONFIG.get("database", {}).get("pool_recycle", 3600), env="DB_POOL_RECYCLE")
+    # SQL 日志配置
+    db_slow_query_ms: float = Field(
+        default=CONFIG.get("database", {}).get("query_log", {}).get("slow_threshold_ms", 200),
+        env="DB_SLOW_QUERY_MS",
+    )
+    db_query_sample_rate: float = Field(
+        default=CONFIG.get("database", {}).get("query_log", {}).get("sample_rate", 0.0),
+        env="DB_QUERY_SAMPLE_RATE",
+    )
+    db_query_log_parameters: bool = Field(
+        default=CONFIG.get("database", {}).get("query_log", {}).get("log_parameters", False),
+        env="DB_QUERY_LOG_PARAMETERS",
+    )
+    # 只读副本配置
+    db_replica_health_interval: int = Field(
+        default=CONFIG.get("database", {}).get("replica_health_interval", 10),
+        env="DB_REPLICA_HEALTH_INTERVAL",
+    )  # 健康检查间隔（秒）
+    db_replica_sticky_seconds: float = Field(
+        default=CONFIG.get("database", {}).get("replica_sticky_seconds", 2),
+        env="DB_REPLICA_STICKY_SECONDS",
+    )  # 租户写入后该时间内的读请求仍走主库
+    db_pool_wait_warn_ms: float = Field(
+        default=CONFIG.get("database", {}).get("pool_wait_warn_ms", 100),
+        env="DB_POOL_WAIT_WARN_MS",
+    )  # 借出连接等待告警阈值（毫秒）
+    db_migration_lock_timeout: float = Field(
+        default=CONFIG.get("database", {}).get("migration_lock_timeout", 60),
+        env="DB_MIGRATION_LOCK_TIMEOUT",
+    )  # 启动迁移/初始化数据的数据库锁等待时间（秒）
+    # 请求级SQL统计
+    db_request_query_threshold: int = Field(
+        default=CONFIG.get("database", {}).get("request_stats", {}).get("log_query_threshold", 20),
+        env="DB_REQUEST_QUERY_THRESHOLD",
+    )  # 单个请求SQL条数告警阈值
+    db_request_time_threshold_ms: float = Field(
+        default=CONFIG.get("database", {}).get("request_stats", {}).get("log_time_threshold_ms", 500),
+        env="DB_REQUEST_TIME_THRESHOLD_MS",
+    )  # 单个请求数据库耗时告警阈值
+    db_n_plus_one_strict: bool = Field(
+        default=CONFIG.get("database", {}).get("request_stats", {}).get("n_plus_one_strict", False),
+        env="DB_N_PLUS_ONE_STRICT",
+    )
+    db_n_plus_one_threshold: int = Field(
+        default=CONFIG.get("database", {}).get("request_stats", {}).get("n_plus_one_threshold", 5),
+        env="DB_N_PLUS_ONE_THRESHOLD",
+    )
+    # 租户分库配置
+    db_tenant_shards: Dict[str, str] = Field(
+        default={str(key): value for key, value in (CONFIG.get("database", {}).get("tenant_shards") or {}).items()},
+        env="DB_TENANT_SHARDS",
+    )  # 租户ID或租户编码 -> 分库名称
+    db_shard_map_refresh_interval: int = Field(
+        default=CONFIG.get("database", {}).get("shard_map_refresh_interval", 30),
+        env="DB_SHARD_MAP_REFRESH_INTERVAL",
+    )
+    db_shard_move_batch_size: int = Field(
+        default=CONFIG.get("database", {}).get("shard_move_batch_size", 1000),
+        env="DB_SHARD_MOVE_BATCH_SIZE",
+    )
+    db_bulk_insert_batch_size: int = Field(
+        default=CONFIG.get("database", {}).get("bulk_insert_batch_size", 500),
+        env="DB_BULK_INSERT_BATCH_SIZE",
+    )  # 批量导入每个事务写入的行数
     @computed_field
     @property
     def async_mysql_dsn(self) -> MySQLDsn:
         source: dict = CONFIG.get("database", {}).get("primary", {})
-        schema=source.get("schema")
-        username=source.get("user")
-        password=source.get("password")
-        host=source.get("host")
-        port=source.get("port")
-        database=source.get('database')
-        return f"{schema}://{username}:{password}@{host}:{port}/{database}"
+        return build_dsn(source)
+
+    @computed_field
+    @property
+    def replica_dsns(self) -> List[str]:
+        """只读副本连接地址列表"""
+        sources: list = CONFIG.get("database", {}).get("replicas") or []
+        return [build_dsn(source) for source in sources]
+
+    @computed_field
+    @property
+    def shard_dsns(self) -> Dict[str, str]:
+        """分库名称 -> 连接地址"""
+        sources: dict = CONFIG.get("database", {}).get("shards") or {}
+        return {name: build_dsn(source) for name, source in sources.items()}
     
     class Config:  
         env_file = ".env"
@@ -1,57 +1,109 @@
-from typing import Annotated, AsyncGenerator
+import asyncio
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Annotated, AsyncGenerator, Dict, List, Optional, Tuple
 from fastapi import Depends
 from sqlmodel import SQLModel, text
 from app.core.config import settings
 from app.core.logger import logger
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql import Select
 from sqlalchemy.orm import sessionmaker
+from app.core.metrics import (
+    InstrumentedAsyncQueuePool, QueryLogger, pool_metrics, request_query_counter, statement_cache_metrics,
+)
 
 
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session, with_loader_criteria
 from app.core.system_context import SystemContext
+from app.models.common import BaseTable
+from app.models.system import TenantModel, TenantShardModel
+from app.core.shard import CATALOG_MODELS, PRIMARY_SHARD, ShardMap
+from app.core.migrations import run_migrations, schema_tables
 
-@event.listens_for(Engine, "before_execute", retval=True)
-def only_deleted0_and_tenant_filter(conn, clauseelement, multiparams, params):
-    # 检查 clauseelement 是否有效且有 whereclause 属性
-    if clauseelement is not None and hasattr(clauseelement, 'whereclause'):
-        # 检查SQL字符串是否包含 audit_log 表
-        sql_str = str(clauseelement)
-        if 'audit_log' in sql_str.lower():
-            return clauseelement, multiparams, params
-        
-        # 检查是否包含JOIN查询，如果包含则跳过自动添加deleted=0和tenant_id
-        if 'join' in sql_str.lower() or 'outer join' in sql_str.lower():
-            return clauseelement, multiparams, params
-        
-        # 获取当前租户ID
-        tenant_id = SystemContext.get_tenant_id()
-        
-        # 构建过滤条件
-        conditions = []
-        
-        # 添加 deleted=0 条件
-        conditions.append(text("deleted=0"))
-        
-        # 添加租户ID条件（如果存在）
+
+# 带 tenant_id/deleted 字段的映射类缓存（按已注册映射数量判断是否需要刷新）
+_filtered_models: Tuple[int, List[type]] = (0, [])
+
+
+def get_filtered_models() -> List[type]:
+    """返回所有继承 BaseTable 的映射类（均包含 tenant_id 与 deleted 字段）"""
+    global _filtered_models
+    mappers = SQLModel._sa_registry.mappers
+    if _filtered_models[0] != len(mappers):
+        models = sorted(
+            (mapper.class_ for mapper in mappers if issubclass(mapper.class_, BaseTable)),
+            key=lambda cls: cls.__tablename__,
+        )
+        _filtered_models = (len(mappers), models)
+    return _filtered_models[1]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def only_deleted0_and_tenant_filter(execute_state):
+    """
+    为 ORM 查询/更新/删除自动追加 deleted=0 与 tenant_id=当前租户 条件
+    - 通过 with_loader_criteria 注入，条件同样作用于 JOIN、子查询及关系加载
+    - 租户ID以绑定参数传递，不影响 SQLAlchemy 编译缓存
+    - 可通过执行选项跳过: include_deleted=True 不过滤已删除数据, all_tenants=True 不过滤租户
+    """
+    if execute_state.is_column_load:
+        # 刷新已加载对象的属性，无需重复过滤
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+
+    criteria = filter_criteria(execute_state.execution_options)
+    if criteria:
+        execute_state.statement = execute_state.statement.options(*criteria)
+
+
+def filter_criteria(options: dict) -> list:
+    """按执行选项生成 deleted=0 与当前租户的过滤条件（也用于不经过会话执行的语句，如 EXPLAIN）"""
+    include_deleted = options.get("include_deleted", False)
+    tenant_id = None if options.get("all_tenants", False) else SystemContext.get_tenant_id()
+
+    criteria = []
+    for model in get_filtered_models():
+        if not include_deleted:
+            criteria.append(
+                with_loader_criteria(model, lambda cls: cls.deleted == 0, include_aliases=True)
+            )
         if tenant_id is not None:
-            conditions.append(text(f"tenant_id={tenant_id}"))
-        
-        # 应用过滤条件
-        if conditions:
-            combined_condition = conditions[0]
-            for condition in conditions[1:]:
-                combined_condition = combined_condition & condition
-            
-            if clauseelement.whereclause is not None:
-                clauseelement = clauseelement.where(
-                    clauseelement.whereclause & combined_condition
-                )
-            else:
-                clauseelement = clauseelement.where(combined_condition)
-    
-    return clauseelement, multiparams, params
+            criteria.append(
+                with_loader_criteria(model, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+            )
+    return criteria
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    """SQLite 连接初始化：与 MySQL 一致地校验外键，文件库启用 WAL 以支持并发读写"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+# 当前任务通过 `async with async_db` 打开的会话栈（按任务隔离，支持嵌套）
+_session_stack: ContextVar[Tuple[AsyncSession, ...]] = ContextVar("db_session_stack", default=())
+
+
+class RoutingSession(Session):
+    """
+    分库及读写分离会话
+    - 当前租户分配到其他分库时，除目录表外的语句均走该分库
+    - flush 及 INSERT/UPDATE/DELETE 走主库，并使本会话及该租户短时间内的读取固定走主库（读己之写）
+    - SELECT 语句按执行选项 use_replica 决定，未指定时取决于当前请求是否只读
+    - 其他语句（text()、未指定语句的 connection() 等）无法判断读写，走主库但不触发读己之写
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw) -> Engine:
+        return async_db.route(self, mapper, clause).sync_engine
+
 
 class AsyncDatabase:
     """异步数据库连接池管理类"""
@@ -59,22 +111,69 @@ class AsyncDatabase:
     def __init__(self):
         self.async_engine = None
         self.AsyncSessionLocal = None
+        # 只读副本引擎及其健康状态
+        self.replica_engines: List[AsyncEngine] = []
+        self.healthy_replicas: List[AsyncEngine] = []
+        self._replica_counter = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        # 租户最近一次写入时间（monotonic），写入后短时间内的读取走主库以规避复制延迟
+        self._tenant_write_time: Dict[Optional[int], float] = {}
+        # 租户分库映射及按需创建的分库引擎
+        self.shard_map = ShardMap(settings.db_tenant_shards)
+        self.shard_engines: Dict[str, AsyncEngine] = {}
+        self._shard_map_task: Optional[asyncio.Task] = None
+
+    def _create_engine(self, url: str, name: str = PRIMARY_SHARD) -> AsyncEngine:
+        """按统一的连接池参数创建引擎，并挂载语句缓存、SQL日志及连接池统计"""
+        url_obj = make_url(url)
+        connect_args = {}
+        pool_args = {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+        }
+        if url_obj.drivername == "postgresql+asyncpg":
+            # asyncpg 每个连接的预编译语句缓存
+            connect_args["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
+        elif url_obj.get_backend_name() == "sqlite" and url_obj.database in (None, "", ":memory:"):
+            # 内存库只能共享单个连接（StaticPool），不支持连接池参数
+            pool_args = {}
+        engine = create_async_engine(
+            url=url,
+            echo=settings.db_echo,
+            query_cache_size=settings.db_query_cache_size,
+            connect_args=connect_args,
+            **pool_args,
+        )
+        if url_obj.get_backend_name() == "sqlite":
+            event.listen(engine.sync_engine, "connect", _sqlite_on_connect)
+        # 编译缓存/预编译语句缓存统计
+        statement_cache_metrics.attach(engine)
+        # 慢查询及采样SQL日志
+        QueryLogger(
+            settings.db_slow_query_ms,
+            settings.db_query_sample_rate,
+            settings.db_query_log_parameters,
+        ).attach(engine)
+        # 请求级SQL条数及耗时统计
+        request_query_counter.attach(engine)
+        # 连接池借出等待、占用时长及连接寿命统计
+        pool_metrics.attach(name, engine, settings.db_pool_wait_warn_ms)
+        return engine
     
     async def init_db_pool(self):
         """初始化数据库连接池"""
-        self.async_engine = create_async_engine(
-            url=settings.async_mysql_dsn,
-            echo=True,
-            pool_size=10,
-            max_overflow=5,
-            pool_timeout=30,
-            pool_recycle=3600,
-        )
+        self.async_engine = self._create_engine(settings.async_mysql_dsn)
+        self.replica_engines = [
+            self._create_engine(dsn, f"replica-{i}") for i, dsn in enumerate(settings.replica_dsns)
+        ]
 
-        # 异步会话工厂
+        # 异步会话工厂（按语句路由主库/只读副本）
         self.AsyncSessionLocal = sessionmaker(
-            bind=self.async_engine,
             class_=AsyncSession,
+            sync_session_class=RoutingSession,
             expire_on_commit=False  
         )
         try:
@@ -84,6 +183,180 @@ class AsyncDatabase:
                 logger.info("✅ 数据库连接池已初始化")
         except Exception as e:
             logger.error(f"❌ 数据库连接池初始化失败")
+
+        if settings.shard_dsns:
+            try:
+                await self.refresh_shard_map()
+            except Exception as e:
+                # 首次启动时映射表尚未创建，create_tables 后会重新加载
+                logger.warning("租户分库映射加载失败: {}", e)
+            self._shard_map_task = asyncio.create_task(self._shard_map_loop())
+
+        if self.replica_engines:
+            await self.check_replicas()
+            self._health_task = asyncio.create_task(self._replica_health_loop())
+            logger.info(
+                "✅ 只读副本已初始化: {}/{} 可用",
+                len(self.healthy_replicas), len(self.replica_engines),
+            )
+
+    def get_shard_engine(self, shard: str) -> AsyncEngine:
+        """获取分库引擎（首次使用时创建连接池）"""
+        if shard == PRIMARY_SHARD:
+            return self.async_engine
+        engine = self.shard_engines.get(shard)
+        if engine is None:
+            dsn = settings.shard_dsns.get(shard)
+            if dsn is None:
+                raise ValueError(f"未配置的分库: {shard}")
+            engine = self.shard_engines[shard] = self._create_engine(dsn, f"shard-{shard}")
+            logger.info("✅ 分库连接池已创建: {}", shard)
+        return engine
+
+    def route(self, session: Session, mapper=None, clause=None) -> AsyncEngine:
+        """为会话中的一次执行选择引擎"""
+        tenant_id = SystemContext.get_tenant_id()
+        model = getattr(mapper, "class_", mapper)
+        if model not in CATALOG_MODELS:
+            shard = self.shard_map.shard_for(tenant_id)
+            if shard != PRIMARY_SHARD:
+                return self.get_shard_engine(shard)
+        if not self.replica_engines:
+            return self.async_engine
+        if session._flushing or getattr(clause, "is_dml", False):
+            # 写操作：本会话后续读取及该租户 db_replica_sticky_seconds 内的读取均走主库
+            session.info["primary_sticky"] = True
+            self._tenant_write_time[tenant_id] = time.monotonic()
+            return self.async_engine
+        if not isinstance(clause, Select) or session.info.get("primary_sticky"):
+            return self.async_engine
+        last_write = self._tenant_write_time.get(tenant_id)
+        if last_write is not None and time.monotonic() - last_write < settings.db_replica_sticky_seconds:
+            return self.async_engine
+
+        use_replica = clause.get_execution_options().get("use_replica")
+        if use_replica is None:
+            use_replica = SystemContext.is_read_only()
+        if not use_replica:
+            return self.async_engine
+        replicas = self.healthy_replicas
+        if not replicas:
+            # 无可用副本时回退主库
+            return self.async_engine
+        return replicas[next(self._replica_counter) % len(replicas)]
+
+    async def check_replicas(self) -> None:
+        """检查各只读副本连通性，更新可用副本列表"""
+        healthy = []
+        for engine in self.replica_engines:
+            url = engine.url.render_as_string(hide_password=True)
+            try:
+                async with engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=settings.db_pool_timeout)
+                healthy.append(engine)
+                if engine not in self.healthy_replicas:
+                    logger.info("只读副本可用: {}", url)
+            except Exception as e:
+                if engine in self.healthy_replicas:
+                    logger.warning("只读副本不可用，读取将转移到其他副本或主库: {} ({})", url, e)
+        self.healthy_replicas = healthy
+
+    async def _replica_health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.db_replica_health_interval)
+            try:
+                await self.check_replicas()
+            except Exception as e:
+                logger.error("只读副本健康检查失败: {}", e)
+
+    async def refresh_shard_map(self) -> None:
+        """从主库重新加载租户分库映射"""
+        async with self.async_engine.connect() as conn:
+            await self.shard_map.load(conn)
+
+    async def _shard_map_loop(self) -> None:
+        # 多进程部署时，其他进程迁移租户后通过定期刷新获取新映射
+        while True:
+            await asyncio.sleep(settings.db_shard_map_refresh_interval)
+            try:
+                await self.refresh_shard_map()
+            except Exception as e:
+                logger.error("租户分库映射刷新失败: {}", e)
+
+    def shard_status(self) -> List[dict]:
+        """分库状态"""
+        assignments = self.shard_map.assignments()
+        return [
+            {
+                "shard": name,
+                "pool_created": name in self.shard_engines,
+                "tenants": sorted(tenant_id for tenant_id, shard in assignments.items() if shard == name),
+            }
+            for name in settings.shard_dsns
+        ]
+
+    async def move_tenant(self, tenant_id: int, target_shard: str) -> Dict[str, int]:
+        """
+        将租户数据迁移到目标分库，返回各表迁移行数
+        - 按外键依赖顺序逐表流式读取源库数据，分批写入目标库（单个事务，失败整体回滚）
+        - 复制完成后更新主库映射，再删除源库数据
+        - 迁移期间的写入不会被复制，调用方需先停用租户
+        """
+        source_shard = self.shard_map.shard_for(tenant_id)
+        if source_shard == target_shard:
+            raise ValueError(f"租户 {tenant_id} 已位于分库 {target_shard}")
+        source = self.get_shard_engine(source_shard)
+        target = self.get_shard_engine(target_shard)
+        tables = [
+            table for table in SQLModel.metadata.sorted_tables
+            if "tenant_id" in table.c and table.name not in (TenantModel.__tablename__, TenantShardModel.__tablename__)
+        ]
+        tenant_table = TenantModel.__table__
+        batch_size = settings.db_shard_move_batch_size
+        moved: Dict[str, int] = {}
+
+        async with source.connect() as source_conn, target.begin() as target_conn:
+            # 目标分库保留一份租户记录以满足外键约束（租户信息以主库为准）
+            if target_shard != PRIMARY_SHARD:
+                exists = await target_conn.scalar(select(tenant_table.c.id).where(tenant_table.c.id == tenant_id))
+                if exists is None:
+                    row = (await source_conn.execute(select(tenant_table).where(tenant_table.c.id == tenant_id))).one()
+                    await target_conn.execute(insert(tenant_table), [dict(row._mapping)])
+
+            for table in tables:
+                sql = select(table).where(table.c.tenant_id == tenant_id).order_by(*table.primary_key.columns)
+                result = await source_conn.stream(sql.execution_options(yield_per=batch_size))
+                count = 0
+                async for rows in result.partitions():
+                    await target_conn.execute(insert(table), [dict(row._mapping) for row in rows])
+                    count += len(rows)
+                moved[table.name] = count
+                logger.info("迁移租户 {} 表 {}: {} 行", tenant_id, table.name, count)
+
+        # 更新主库中的映射
+        async with self.async_engine.begin() as conn:
+            await conn.execute(delete(TenantShardModel).where(TenantShardModel.tenant_id == tenant_id))
+            await conn.execute(insert(TenantShardModel).values(tenant_id=tenant_id, shard=target_shard))
+        self.shard_map.assign(tenant_id, target_shard)
+
+        # 删除源库数据（主库保留租户记录）
+        async with source.begin() as conn:
+            for table in reversed(tables):
+                await conn.execute(delete(table).where(table.c.tenant_id == tenant_id))
+            if source_shard != PRIMARY_SHARD:
+                await conn.execute(delete(tenant_table).where(tenant_table.c.id == tenant_id))
+        logger.info("✅ 租户 {} 已从分库 {} 迁移到 {}", tenant_id, source_shard, target_shard)
+        return moved
+
+    def replica_status(self) -> List[dict]:
+        """只读副本状态"""
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": engine in self.healthy_replicas,
+            }
+            for engine in self.replica_engines
+        ]
     
     async def get_async_db(self) -> AsyncGenerator:
         """获取数据库会话（依赖注入用）"""
@@ -92,20 +365,41 @@ class AsyncDatabase:
     
     async def close_db_pool(self):
         """关闭数据库连接池"""
+        for task in (self._health_task, self._shard_map_task):
+            if task:
+                task.cancel()
+        self._health_task = self._shard_map_task = None
+        for engine in [*self.replica_engines, *self.shard_engines.values()]:
+            await engine.dispose()
+        self.shard_engines.clear()
         if self.async_engine:
             await self.async_engine.dispose()
             logger.info("✅ 数据库连接池已关闭")
 
     async def create_tables(self):
-        """创建数据库表"""
-        async with self.async_engine.begin() as conn:
-            await conn.run_sync(SQLModel.metadata.create_all)
-    async def __aenter__(self):
-        self.session = self.AsyncSessionLocal()
-        return self.session
+        """直接按模型创建数据库表（主库及所有已配置的分库），不记录结构版本；启动时使用 migrate"""
+        for shard in [PRIMARY_SHARD, *settings.shard_dsns]:
+            async with self.get_shard_engine(shard).begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all, tables=schema_tables(shard))
+        if settings.shard_dsns:
+            await self.refresh_shard_map()
+
+    async def migrate(self) -> int:
+        """迁移主库及所有已配置的分库到最新结构版本，版本一致时不执行 DDL；返回执行的迁移数量"""
+        engines = [(shard, self.get_shard_engine(shard)) for shard in [PRIMARY_SHARD, *settings.shard_dsns]]
+        applied = await run_migrations(engines)
+        if settings.shard_dsns:
+            await self.refresh_shard_map()
+        return applied
+    async def __aenter__(self) -> AsyncSession:
+        session = self.AsyncSessionLocal()
+        _session_stack.set(_session_stack.get() + (session,))
+        return session
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.close()
+        stack = _session_stack.get()
+        _session_stack.set(stack[:-1])
+        await stack[-1].close()
 # 创建全局实例
 async_db = AsyncDatabase()
 
@@ -1,11 +1,10 @@
 from datetime import datetime, timedelta
 from functools import wraps
+import inspect
 from typing import Annotated, Any, AsyncGenerator, Callable, Optional
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordBearer
 import jwt
-from sqlmodel import select
-from sqlalchemy.orm import selectinload
 from app.core.config import settings
 from app.core.db import async_db,AsyncSessionDep
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,8 +12,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY, security, verify_access_token, verify_refresh_token
 from app.models.common import TokenPayload
-from app.models.system import UserModel, UserRoleModel, RoleModel, RolePermissionModel, PermissionModel, TenantModel
+from app.models.system import UserModel, TenantModel
 from app.core.system_context import SystemContext
+from app.core.permission import load_user_permissions, permission_cache
+from app.core.principal import Principal, get_principal
 
 
 
@@ -22,8 +23,8 @@ from app.core.system_context import SystemContext
 async def get_current_user(
         session: AsyncSessionDep,
         credentials: HTTPAuthorizationCredentials = Depends(security)
-    ):
-    """获取当前用户（使用访问令牌）"""
+    ) -> Principal:
+    """获取当前用户快照（使用访问令牌）"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -31,8 +32,8 @@ async def get_current_user(
     )
     user_id = verify_access_token(credentials.credentials, credentials_exception)
 
-    # 根据用户ID获取用户信息
-    user = await session.get(UserModel, user_id)
+    # 根据用户ID获取用户快照（优先读取缓存）
+    user = await get_principal(session, user_id, SystemContext.get_tenant_id())
     if not user:
         raise credentials_exception
     # 验证用户是否激活
@@ -45,6 +46,20 @@ async def get_current_user(
     
     return user
 
+async def get_current_user_model(
+    session: AsyncSessionDep,
+    principal: Principal = Depends(get_current_user),
+) -> UserModel:
+    """获取当前用户完整信息（仅在需要完整 UserModel 时使用）"""
+    user = await session.get(UserModel, principal.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
 async def get_current_user_with_refresh(
     request: Request,
     session: AsyncSessionDep,
@@ -83,59 +98,74 @@ async def refresh_access_token(
     
     return {"access_token": new_access_token, "token_type": "bearer"}
 
-async def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     """获取当前激活用户"""
     if not current_user.status == 1:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-async def check_permission(user: UserModel, required_permission: str) -> bool:
-    """检查用户是否拥有指定权限"""
+async def check_permission(
+    user: Principal,
+    required_permission: str,
+    session: Optional[AsyncSession] = None,
+) -> bool:
+    """检查用户是否拥有指定权限
+    :param session: 请求级数据库会话，为空时临时创建会话
+    """
     # 这里可以根据业务需求判断是否为超级管理员
     # 例如：用户名是否为admin，或者有特定的角色标识
     if user.username == "admin":
         return True
-    async with async_db as session:
-        # 查询用户的所有角色
-        # 获取用户的所有角色（通过UserRoleModel关联）
-        user_roles_query = select(RoleModel).join(UserRoleModel).where(
-            UserRoleModel.user_id == user.id,
-            UserRoleModel.status == 0,  # 只查询正常状态的角色关联
-            RoleModel.status == 0,      # 只查询正常状态的角色
-            RoleModel.deleted == 0      # 只查询未删除的角色
-        ).options(
-            selectinload(RoleModel.permissions).selectinload(RolePermissionModel.permission)
-        )
-        
-        result = await session.execute(user_roles_query)
-        roles = result.scalars().all()
-        
-        # 检查用户角色是否拥有所需权限
-        for role in roles:
-            for role_perm in role.permissions:
-                permission = role_perm.permission
-                if permission.identifier == required_permission and permission.status == 0:
-                    return True
-    return False
+    # 命中缓存时无需访问数据库
+    permissions = permission_cache.get(user.tenant_id, user.id)
+    if permissions is None:
+        version = permission_cache.version
+        if session is not None:
+            permissions = await load_user_permissions(session, user.id, user.tenant_id)
+        else:
+            async with async_db as new_session:
+                permissions = await load_user_permissions(new_session, user.id, user.tenant_id)
+        permission_cache.set(user.tenant_id, user.id, permissions, version)
+    # 单次位运算判断是否拥有权限
+    return permissions.has(required_permission)
+
+
+# 装饰器注入的请求级会话参数名
+PERMISSION_SESSION_PARAM = "_permission_session"
 
 
 def require_permission(permission: str):
-    """权限检查装饰器"""
+    """权限检查装饰器
+    通过改写函数签名额外声明一个 AsyncSessionDep 依赖，FastAPI 会在同一请求内复用该会话，
+    权限检查不再单独占用一个连接
+    """
     def permission_checker(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(
             *args: Any,
             **kwargs: Any
         ) -> Any:
-            current_user: UserModel = kwargs.get("current_user") or kwargs.get("user")
-            has_permission = await check_permission(current_user, permission)
+            session: Optional[AsyncSession] = kwargs.pop(PERMISSION_SESSION_PARAM, None)
+            current_user: Principal = kwargs.get("current_user") or kwargs.get("user")
+            has_permission = await check_permission(current_user, permission, session)
             if not has_permission:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"权限不足，需要权限: {permission}"
                 )
             return await func(*args, **kwargs)
+
+        signature = inspect.signature(func)
+        if PERMISSION_SESSION_PARAM not in signature.parameters:
+            session_param = inspect.Parameter(
+                PERMISSION_SESSION_PARAM,
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=AsyncSessionDep,
+            )
+            wrapper.__signature__ = signature.replace(
+                parameters=[*signature.parameters.values(), session_param]
+            )
         return wrapper
     return permission_checker
 
@@ -152,7 +182,8 @@ async def get_current_tenant(session: AsyncSessionDep) -> Optional[TenantModel]:
     return None
 
 
-CurrentUser = Annotated[UserModel, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+CurrentUserModel = Annotated[UserModel, Depends(get_current_user_model)]
 CurrentTenant = Annotated[Optional[TenantModel], Depends(get_current_tenant)]
 
 
@@ -33,10 +33,18 @@ def setup_logging():
     # 移除默认handler
     logger.remove()
     
+    # SQL 日志单独输出，不进入常规日志
+    def not_sql(record) -> bool:
+        return "sql" not in record["extra"]
+
+    def only_sql(record) -> bool:
+        return "sql" in record["extra"]
+
     # 添加控制台输出（开发环境）
     if os.getenv("ENV", "dev") == "dev":
         logger.add(
             sink=sys.stdout,
+            filter=not_sql,
             format=stdout_format,
             level="DEBUG",
             backtrace=True,  # 控制是否在日志中包含完整的回溯信息(异常时的完整调用链)
@@ -52,10 +60,26 @@ def setup_logging():
         encoding="utf-8",
         level="INFO",
         format=file_format,
+        filter=not_sql,
         backtrace=True,
         diagnose=False  # 生产环境关闭敏感信息
     )
     
+    # 添加SQL日志输出（慢查询及采样语句，按天轮转）
+    sql_log_dir = log_dir / "sql"
+    sql_log_dir.mkdir(exist_ok=True)
+    logger.add(
+        sink=sql_log_dir / log_file_format,
+        rotation="00:00",
+        retention="7 days",
+        compression="zip",
+        encoding="utf-8",
+        level="INFO",
+        format=file_format,
+        filter=only_sql,
+        enqueue=True,  # 异步写入，避免阻塞请求
+    )
+    
     return logger.bind(request_id="N/A")  # 绑定默认request_id
 
 # 初始化日志
@@ -0,0 +1,390 @@
+import random
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.core.logger import logger
+from app.core.system_context import SystemContext
+
+
+def _sync_engine(engine: AsyncEngine | Engine) -> Engine:
+    return engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+
+class StatementCacheMetrics:
+    """
+    语句缓存统计
+    - SQLAlchemy 编译缓存: 根据每次执行的 ExecutionContext.cache_hit 计数
+    - asyncpg 预编译语句缓存: 执行前检查语句是否已在连接的预编译缓存中
+    """
+
+    def __init__(self) -> None:
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.compiled_no_key = 0      # 语句不可缓存（如 text()、DDL）
+        self.compiled_disabled = 0    # 引擎未启用缓存
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+        # 已见过的 asyncpg 连接，用于汇总各连接的预编译缓存大小
+        self._prepared_caches: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+    def attach(self, engine: AsyncEngine | Engine) -> None:
+        """为引擎注册统计事件"""
+        sync_engine = _sync_engine(engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        adapted = conn.connection.dbapi_connection
+        cache = getattr(adapted, "_prepared_statement_cache", None)
+        if cache is None:
+            return
+        self._prepared_caches.add(adapted)
+        if statement in cache:
+            self.prepared_hits += 1
+        else:
+            self.prepared_misses += 1
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        dialect = context.dialect
+        cache_hit = context.cache_hit
+        if cache_hit == dialect.CACHE_HIT:
+            self.compiled_hits += 1
+        elif cache_hit == dialect.CACHE_MISS:
+            self.compiled_misses += 1
+        elif cache_hit == dialect.NO_CACHE_KEY:
+            self.compiled_no_key += 1
+        else:
+            self.compiled_disabled += 1
+
+    def snapshot(self, engine: Optional[AsyncEngine | Engine] = None) -> Dict[str, Any]:
+        """当前统计快照"""
+        compiled_total = self.compiled_hits + self.compiled_misses
+        prepared_total = self.prepared_hits + self.prepared_misses
+        compiled: Dict[str, Any] = {
+            "hits": self.compiled_hits,
+            "misses": self.compiled_misses,
+            "no_cache_key": self.compiled_no_key,
+            "disabled": self.compiled_disabled,
+            "hit_rate": round(self.compiled_hits / compiled_total, 4) if compiled_total else 0.0,
+        }
+        if engine is not None:
+            cache = _sync_engine(engine)._compiled_cache
+            compiled["size"] = len(cache) if cache is not None else 0
+            compiled["capacity"] = cache.capacity if cache is not None else 0
+
+        caches = [adapted._prepared_statement_cache for adapted in list(self._prepared_caches)]
+        prepared = {
+            "connections": len(caches),
+            "size": sum(len(cache) for cache in caches),
+            "capacity_per_connection": caches[0].capacity if caches else 0,
+            "hits": self.prepared_hits,
+            "misses": self.prepared_misses,
+            "hit_rate": round(self.prepared_hits / prepared_total, 4) if prepared_total else 0.0,
+        }
+        return {"compiled_cache": compiled, "prepared_statement_cache": prepared}
+
+    def reset(self) -> None:
+        """重置计数（不清空缓存本身）"""
+        self.compiled_hits = self.compiled_misses = 0
+        self.compiled_no_key = self.compiled_disabled = 0
+        self.prepared_hits = self.prepared_misses = 0
+
+
+# 全局语句缓存统计
+statement_cache_metrics = StatementCacheMetrics()
+
+
+class QueryLogger:
+    """
+    SQL 执行日志（替代 echo=True）
+    - 耗时超过 slow_threshold_ms 的语句全部记录为 WARNING
+    - 其余语句按 sample_rate 采样记录为 INFO
+    - 日志绑定 sql 标记与当前请求ID，由独立的 loguru sink 输出
+    """
+
+    def __init__(self, slow_threshold_ms: float, sample_rate: float, log_parameters: bool = False) -> None:
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.log_parameters = log_parameters
+        self.slow_count = 0
+
+    def attach(self, engine: AsyncEngine | Engine) -> None:
+        """为引擎注册计时事件"""
+        sync_engine = _sync_engine(engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        is_slow = elapsed_ms >= self.slow_threshold_ms
+        if is_slow:
+            self.slow_count += 1
+        elif not self.sample_rate or random.random() >= self.sample_rate:
+            return
+
+        sql_logger = logger.bind(sql=True, request_id=SystemContext.get_request_id() or "N/A")
+        sql = " ".join(statement.split())
+        if self.log_parameters:
+            sql = f"{sql} | params={parameters!r}"
+        if is_slow:
+            sql_logger.warning("slow query {:.1f}ms: {}", elapsed_ms, sql)
+        else:
+            sql_logger.info("query {:.1f}ms: {}", elapsed_ms, sql)
+
+
+class RequestQueryStats:
+    """单个请求内的SQL统计"""
+
+    __slots__ = ("count", "total_ms", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        # 语句形态（参数化后的SQL文本）-> 执行次数
+        self.shapes: Counter = Counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """同一形态执行次数达到阈值的语句（疑似 N+1）"""
+        return [(sql, count) for sql, count in self.shapes.most_common() if count >= threshold]
+
+
+class RequestQueryCounter:
+    """
+    按请求统计SQL条数与数据库耗时
+    - 统计对象保存在上下文变量中（按请求任务隔离，不依赖客户端传入的请求ID），请求开始时 begin、结束时 end
+    - 非请求内（启动任务、后台任务）执行的语句不计入
+    """
+
+    def __init__(self) -> None:
+        self._current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+    def attach(self, engine: AsyncEngine | Engine) -> None:
+        """为引擎注册计数事件"""
+        sync_engine = _sync_engine(engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    def begin(self) -> RequestQueryStats:
+        stats = RequestQueryStats()
+        self._current.set(stats)
+        return stats
+
+    def end(self) -> Optional[RequestQueryStats]:
+        stats = self._current.get()
+        self._current.set(None)
+        return stats
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("request_query_start", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("request_query_start"):
+            conn.info["request_query_start"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["request_query_start"].pop()) * 1000
+        stats = self._current.get()
+        if stats is None:
+            return
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.shapes[statement] += 1
+
+
+# 全局请求SQL统计
+request_query_counter = RequestQueryCounter()
+
+
+class Histogram:
+    """固定桶直方图（累计计数，与 Prometheus 直方图一致）"""
+
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "buckets": {f"le_{bound:g}": count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+# 等待/占用时长桶（毫秒），超过最大桶的部分由 count 与最后一个桶之差得出
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# 连接寿命桶（秒）
+CONNECTION_LIFETIME_BUCKETS_S = (1, 10, 60, 300, 900, 1800, 3600, 7200)
+
+# 等待超阈值告警的最小间隔（秒），避免连接池耗尽时日志刷屏
+POOL_WAIT_WARNING_INTERVAL = 10
+
+
+class PoolMetrics:
+    """
+    连接池统计
+    - 借出等待时长直方图、等待超时次数（由 InstrumentedAsyncQueuePool 记录）
+    - 连接占用时长（checkout -> checkin）及连接寿命（connect -> close）直方图
+    - 当前已借出/空闲/溢出连接数在快照时直接读取连接池
+    """
+
+    def __init__(self, name: str, wait_warn_ms: float) -> None:
+        self.name = name
+        self.wait_warn_ms = wait_warn_ms
+        self.wait_ms = Histogram(POOL_WAIT_BUCKETS_MS)
+        self.hold_ms = Histogram(POOL_WAIT_BUCKETS_MS)
+        self.lifetime_s = Histogram(CONNECTION_LIFETIME_BUCKETS_S)
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._last_warning = 0.0
+        self._pool: Optional[Pool] = None
+
+    def attach(self, engine: AsyncEngine | Engine) -> None:
+        """为引擎连接池注册事件；若为 InstrumentedAsyncQueuePool 同时记录借出等待"""
+        sync_engine = _sync_engine(engine)
+        self._pool = sync_engine.pool
+        if isinstance(sync_engine.pool, InstrumentedAsyncQueuePool):
+            sync_engine.pool.metrics = self
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+        event.listen(sync_engine, "close", self._on_close)
+        event.listen(sync_engine, "invalidate", self._on_invalidate)
+
+    def observe_wait(self, elapsed_ms: float) -> None:
+        self.wait_ms.observe(elapsed_ms)
+        if elapsed_ms < self.wait_warn_ms:
+            return
+        now = time.monotonic()
+        if now - self._last_warning >= POOL_WAIT_WARNING_INTERVAL:
+            self._last_warning = now
+            logger.warning(
+                "连接池 {} 借出等待 {:.1f}ms 超过阈值 {}ms: {}",
+                self.name, elapsed_ms, self.wait_warn_ms, self.gauges(),
+            )
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+        connection_record.info["created_at"] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_at"] = time.monotonic()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checkout_at = connection_record.info.pop("checkout_at", None)
+        if checkout_at is not None:
+            self.hold_ms.observe((time.monotonic() - checkout_at) * 1000)
+
+    def _on_close(self, dbapi_connection, connection_record):
+        created_at = connection_record.info.pop("created_at", None)
+        if created_at is not None:
+            self.lifetime_s.observe(time.monotonic() - created_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def gauges(self) -> Dict[str, Any]:
+        """当前连接数"""
+        pool = self._pool
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            return {"pool_class": type(pool).__name__ if pool is not None else None}
+        return {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "gauges": self.gauges(),
+            "checkout_wait_ms": self.wait_ms.snapshot(),
+            "checkout_timeouts": self.timeouts,
+            "hold_ms": self.hold_ms.snapshot(),
+            "connection_lifetime_s": self.lifetime_s.snapshot(),
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """记录借出等待时长的连接池（等待空闲连接、新建连接及借出事件的总耗时）"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # engine.dispose() 会重建连接池，沿用同一统计对象
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics._pool = pool
+        return pool
+
+
+class PoolMetricsRegistry:
+    """各引擎（主库、只读副本、分库）的连接池统计"""
+
+    def __init__(self) -> None:
+        self._pools: Dict[str, PoolMetrics] = {}
+
+    def attach(self, name: str, engine: AsyncEngine | Engine, wait_warn_ms: float) -> PoolMetrics:
+        metrics = self._pools[name] = PoolMetrics(name, wait_warn_ms)
+        metrics.attach(engine)
+        return metrics
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [metrics.snapshot() for metrics in self._pools.values()]
+
+
+# 全局连接池统计
+pool_metrics = PoolMetricsRegistry()
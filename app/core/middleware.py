@@ -1,7 +1,10 @@
 from datetime import datetime
 from uuid import uuid4
 from fastapi import Request
+from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import RequestQueryStats, request_query_counter
+from app.core.system_context import SystemContext
 
 class RequestContext:
     def __init__(self, request_id: str):
@@ -15,6 +18,9 @@ def register_middleware(app):
         # 生成或获取请求ID
         request_id = request.headers.get("X-Request-ID", str(uuid4().hex))
         request.state.request_id = request_id
+        SystemContext.set_request_id(request_id)
+        # GET/HEAD 请求的查询默认路由到只读副本
+        SystemContext.set_read_only(request.method in ("GET", "HEAD"))
         
         # 创建日志上下文
         request_context = RequestContext(request_id)
@@ -23,6 +29,8 @@ def register_middleware(app):
         
         # 绑定请求ID到日志
         bound_logger = logger.bind(request_id=request_id)
+        # 统计本请求执行的SQL
+        query_stats = request_query_counter.begin()
         
         # 记录请求开始
         bound_logger.info(
@@ -47,6 +55,7 @@ def register_middleware(app):
             
             # 添加请求ID到响应头
             response.headers["X-Request-ID"] = request_id
+            add_query_stats(request, response, query_stats, bound_logger)
             
             return response
             
@@ -56,4 +65,29 @@ def register_middleware(app):
                 str(e),
                 exc_info=True
             )
-            raise
\ No newline at end of file
+            raise
+        finally:
+            request_query_counter.end()
+
+
+def add_query_stats(request: Request, response, stats: RequestQueryStats, bound_logger) -> None:
+    """将本请求的SQL条数及耗时写入响应头，超过阈值时记录警告"""
+    response.headers["X-DB-Queries"] = str(stats.count)
+    timing = f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+    if stats.count > settings.db_request_query_threshold or stats.total_ms > settings.db_request_time_threshold_ms:
+        bound_logger.warning(
+            "Request {} {} issued {} queries in {:.1f}ms",
+            request.method, request.url.path, stats.count, stats.total_ms,
+        )
+    if settings.db_n_plus_one_strict:
+        repeated = stats.repeated(settings.db_n_plus_one_threshold)
+        if repeated:
+            response.headers["X-DB-Repeated-Queries"] = str(len(repeated))
+            for sql, count in repeated:
+                bound_logger.warning(
+                    "Possible N+1 in {} {}: {}x {}",
+                    request.method, request.url.path, count, " ".join(sql.split()),
+                )
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+数据库结构迁移
+- sys_schema_version 记录已执行的迁移版本，启动时版本一致则不执行任何 DDL（仅一次查询）
+- 版本落后时先获取咨询锁，再次确认版本后按顺序执行未完成的迁移，多进程启动只有一个进程执行
+- 迁移需可重复执行（如 create_all / Index.create 均使用 checkfirst），
+  因为新库的基线迁移直接按当前模型建表，后续迁移中的对象可能已存在
+"""
+import json
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Connection, Table, func, insert, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.shard import PRIMARY_SHARD
+from app.models.archive import ARCHIVE_TABLES
+from app.models.system import DeptModel, SchemaVersionModel, TenantShardModel, UserDeptModel, UserModel
+
+# 仅存于主库的表（分库不创建）
+PRIMARY_ONLY_TABLES = (TenantShardModel.__tablename__,)
+
+MIGRATION_LOCK = "zeno:migrate"
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection, str], None]  # (同步连接, 分库名称)
+
+
+def schema_tables(shard: str) -> List[Table]:
+    """指定库应包含的表（按外键依赖排序）"""
+    return [
+        table for table in SQLModel.metadata.sorted_tables
+        if shard == PRIMARY_SHARD or table.name not in PRIMARY_ONLY_TABLES
+    ]
+
+
+def _baseline(conn: Connection, shard: str) -> None:
+    SQLModel.metadata.create_all(conn, tables=schema_tables(shard), checkfirst=True)
+
+
+def _create_indexes(conn: Connection, shard: str) -> None:
+    """按模型声明补建索引（已存在的跳过）"""
+    duplicates = conn.execute(
+        select(UserModel.tenant_id, UserModel.username)
+        .group_by(UserModel.tenant_id, UserModel.username)
+        .having(func.count() > 1)
+        .limit(10)
+    ).all()
+    if duplicates:
+        # 唯一索引建立前需人工处理重复账号（含逻辑删除的记录）
+        raise RuntimeError(f"[{shard}] sys_user 存在重复账号，无法创建唯一索引: {[tuple(row) for row in duplicates]}")
+    existing = set(inspect(conn).get_table_names())
+    for table in schema_tables(shard):
+        if table.name not in existing:  # 由后续迁移建表（建表时一并创建索引）
+            continue
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            index.create(conn, checkfirst=True)
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _user_dept_table(conn: Connection, shard: str) -> None:
+    """创建 sys_user_dept 并从 sys_user.dept_ids（JSON 数组）回填；旧列保留不再使用"""
+    UserDeptModel.__table__.create(conn, checkfirst=True)
+    columns = {column["name"] for column in inspect(conn).get_columns(UserModel.__tablename__)}
+    if "dept_ids" not in columns:
+        return
+
+    dept_ids = set(conn.execute(select(DeptModel.id)).scalars())
+    existing = set(conn.execute(select(UserDeptModel.user_id, UserDeptModel.dept_id)).tuples())
+    legacy_sql = text(
+        "SELECT id, tenant_id, dept_ids FROM sys_user"
+        " WHERE id > :last_id AND dept_ids IS NOT NULL ORDER BY id LIMIT :limit"
+    )
+    last_id, copied = 0, 0
+    while True:
+        users = conn.execute(legacy_sql, {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}).all()
+        if not users:
+            break
+        rows = []
+        for user_id, tenant_id, value in users:
+            members = json.loads(value) if isinstance(value, str) else value
+            for dept_id in dict.fromkeys(members or []):
+                # 忽略已不存在的部门及已回填的记录
+                if dept_id in dept_ids and (user_id, dept_id) not in existing:
+                    rows.append({"tenant_id": tenant_id, "user_id": user_id, "dept_id": dept_id})
+        if rows:
+            conn.execute(insert(UserDeptModel.__table__), rows)
+            copied += len(rows)
+        last_id = users[-1][0]
+    logger.info("[{}] sys_user_dept 回填 {} 条", shard, copied)
+
+
+def _version_columns(conn: Connection, shard: str) -> None:
+    """为带版本号的表补充 version 列（乐观锁），已有数据版本为 0"""
+    preparer = conn.dialect.identifier_preparer
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    for table in schema_tables(shard):
+        if "version" not in table.c or table.name not in existing:
+            continue
+        if "version" in {column["name"] for column in inspector.get_columns(table.name)}:
+            continue
+        conn.execute(text(f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+        logger.info("[{}] {} 新增 version 列", shard, table.name)
+
+
+def _archive_tables(conn: Connection, shard: str) -> None:
+    """创建逻辑删除数据归档表"""
+    for table in ARCHIVE_TABLES.values():
+        table.create(conn, checkfirst=True)
+
+
+# 按版本号递增排列，新增迁移追加到末尾
+MIGRATIONS: List[Migration] = [
+    Migration(1, "初始表结构", _baseline),
+    Migration(2, "热点查询索引", _create_indexes),
+    Migration(3, "用户部门关联表", _user_dept_table),
+    Migration(4, "乐观锁版本号", _version_columns),
+    Migration(5, "逻辑删除数据归档表", _archive_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@asynccontextmanager
+async def advisory_lock(conn: AsyncConnection, name: str, timeout: Optional[float] = None):
+    """
+    数据库咨询锁（会话级，持有到退出上下文）
+    - MySQL: GET_LOCK / RELEASE_LOCK
+    - PostgreSQL: pg_advisory_lock / pg_advisory_unlock
+    - SQLite 等无咨询锁的单机库直接进入，由调用方加锁后的二次检查保证幂等
+    """
+    timeout = settings.db_migration_lock_timeout if timeout is None else timeout
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        acquired = await conn.scalar(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout})
+        if acquired != 1:
+            raise TimeoutError(f"获取数据库锁超时: {name}")
+        try:
+            yield
+        finally:
+            await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+    elif dialect == "postgresql":
+        key = zlib.crc32(name.encode())
+        await conn.execute(text(f"SET lock_timeout = '{int(timeout * 1000)}ms'"))
+        try:
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+        except DBAPIError as e:
+            # 超时后事务已中止，回滚同时撤销 SET lock_timeout
+            await conn.rollback()
+            raise TimeoutError(f"获取数据库锁超时: {name}") from e
+        await conn.execute(text("RESET lock_timeout"))
+        try:
+            yield
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+    else:
+        yield
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    """当前库的结构版本，版本表不存在时为 0"""
+    async with engine.connect() as conn:
+        try:
+            return await conn.scalar(select(func.max(SchemaVersionModel.version))) or 0
+        except Exception:
+            return 0
+
+
+async def migrate_engine(engine: AsyncEngine, shard: str = PRIMARY_SHARD) -> int:
+    """将单个库迁移到最新版本，返回执行的迁移数量"""
+    if await current_version(engine) >= LATEST_VERSION:
+        return 0
+
+    applied = 0
+    async with engine.connect() as conn:
+        async with advisory_lock(conn, MIGRATION_LOCK):
+            # 等锁期间可能已由其他进程完成迁移
+            await conn.run_sync(SchemaVersionModel.__table__.create, checkfirst=True)
+            version = await conn.scalar(select(func.max(SchemaVersionModel.version))) or 0
+            await conn.commit()
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                start = time.perf_counter()
+                await conn.run_sync(migration.upgrade, shard)
+                await conn.execute(
+                    insert(SchemaVersionModel).values(version=migration.version, description=migration.description)
+                )
+                await conn.commit()
+                applied += 1
+                logger.info(
+                    "✅ 数据库迁移 [{}] v{} {} ({:.0f}ms)",
+                    shard, migration.version, migration.description, (time.perf_counter() - start) * 1000,
+                )
+    return applied
+
+
+async def run_migrations(engines: List[tuple]) -> int:
+    """
+    迁移主库及各分库
+    :param engines: [(分库名称, 引擎)]
+    """
+    applied = 0
+    for shard, engine in engines:
+        applied += await migrate_engine(engine, shard)
+    if not applied:
+        logger.info("数据库结构已是最新版本 v{}", LATEST_VERSION)
+    return applied
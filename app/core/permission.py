@@ -0,0 +1,160 @@
+from typing import Dict, Iterable, Optional, Tuple
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.system import PermissionModel, RoleModel, RolePermissionModel, UserRoleModel
+from app.utils.cache import TTLCache
+
+
+class TenantPermissionIndex:
+    """
+    租户权限索引
+    - bits: 权限标识 -> 稠密位序号（同一标识的多条权限共用一个位）
+    - role_masks: 角色ID -> 该角色拥有权限的位图（Python int）
+    """
+
+    __slots__ = ("bits", "role_masks")
+
+    def __init__(self, bits: Dict[str, int], role_masks: Dict[int, int]) -> None:
+        self.bits = bits
+        self.role_masks = role_masks
+
+    @classmethod
+    def build(
+        cls,
+        permissions: Iterable[Tuple[int, str]],
+        grants: Iterable[Tuple[int, int]],
+    ) -> "TenantPermissionIndex":
+        """
+        构建索引
+        :param permissions: (权限ID, 权限标识) 列表，仅包含有效权限
+        :param grants: (角色ID, 权限ID) 列表，仅包含有效角色
+        """
+        bits: Dict[str, int] = {}
+        perm_bits: Dict[int, int] = {}
+        for perm_id, identifier in permissions:
+            perm_bits[perm_id] = bits.setdefault(identifier, len(bits))
+
+        role_masks: Dict[int, int] = {}
+        for role_id, perm_id in grants:
+            bit = perm_bits.get(perm_id)
+            if bit is not None:
+                role_masks[role_id] = role_masks.get(role_id, 0) | (1 << bit)
+        return cls(bits, role_masks)
+
+    def mask_for_roles(self, role_ids: Iterable[int]) -> int:
+        """多个角色权限位图取并集"""
+        mask = 0
+        for role_id in role_ids:
+            mask |= self.role_masks.get(role_id, 0)
+        return mask
+
+
+class UserPermissionMask:
+    """用户有效权限位图，与生成它的租户索引绑定，避免索引重建后位序号错位"""
+
+    __slots__ = ("index", "mask")
+
+    def __init__(self, index: TenantPermissionIndex, mask: int) -> None:
+        self.index = index
+        self.mask = mask
+
+    def has(self, identifier: str) -> bool:
+        bit = self.index.bits.get(identifier)
+        return bit is not None and (self.mask >> bit) & 1 == 1
+
+
+class PermissionCache:
+    """
+    权限缓存（按租户隔离）
+    - 租户级: tenant_id -> TenantPermissionIndex
+    - 用户级: (tenant_id, user_id) -> UserPermissionMask
+    - 角色/菜单变更时按租户失效，用户角色变更时按用户失效
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._indexes: TTLCache[Optional[int], TenantPermissionIndex] = TTLCache(max_size, ttl)
+        self._users: TTLCache[Tuple[Optional[int], int], UserPermissionMask] = TTLCache(max_size, ttl)
+        # 每次失效都会递增，用于丢弃失效前已开始加载的旧数据
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, tenant_id: Optional[int], user_id: int) -> Optional[UserPermissionMask]:
+        return self._users.get((tenant_id, user_id))
+
+    def set(self, tenant_id: Optional[int], user_id: int, permissions: UserPermissionMask, version: int) -> None:
+        """写入缓存，若加载期间发生过失效则放弃写入"""
+        if version != self._version:
+            return
+        self._users.set((tenant_id, user_id), permissions)
+
+    def get_index(self, tenant_id: Optional[int]) -> Optional[TenantPermissionIndex]:
+        return self._indexes.get(tenant_id)
+
+    def set_index(self, tenant_id: Optional[int], index: TenantPermissionIndex, version: int) -> None:
+        if version != self._version:
+            return
+        self._indexes.set(tenant_id, index)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """失效指定用户的权限缓存"""
+        self._version += 1
+        self._users.evict(lambda key, _: key[1] == user_id)
+
+    def invalidate_tenant(self, tenant_id: Optional[int]) -> None:
+        """失效指定租户的权限索引及其下所有用户的权限缓存"""
+        self._version += 1
+        self._indexes.pop(tenant_id)
+        self._users.evict(lambda key, _: key[0] == tenant_id)
+
+    def clear(self) -> None:
+        self._version += 1
+        self._indexes.clear()
+        self._users.clear()
+
+    def stats(self) -> dict:
+        return {"tenants": self._indexes.stats(), "users": self._users.stats()}
+
+
+# 全局权限缓存实例
+permission_cache = PermissionCache(settings.permission_cache_size, settings.permission_cache_ttl)
+
+
+async def load_tenant_index(session: AsyncSession, tenant_id: Optional[int]) -> TenantPermissionIndex:
+    """从数据库加载租户的权限索引"""
+    perm_sql = select(PermissionModel.id, PermissionModel.identifier).where(
+        PermissionModel.tenant_id == tenant_id,
+        PermissionModel.identifier.is_not(None),
+        PermissionModel.status == 0,
+        PermissionModel.deleted == 0,
+    ).order_by(PermissionModel.id).execution_options(use_replica=True)
+    permissions = (await session.execute(perm_sql)).all()
+
+    grant_sql = select(RolePermissionModel.role_id, RolePermissionModel.perm_id).join(RoleModel).where(
+        RoleModel.tenant_id == tenant_id,
+        RoleModel.status == 0,      # 只统计正常状态的角色
+        RoleModel.deleted == 0,     # 只统计未删除的角色
+        RolePermissionModel.deleted == 0,
+    ).execution_options(use_replica=True)
+    grants = (await session.execute(grant_sql)).all()
+    return TenantPermissionIndex.build(permissions, grants)
+
+
+async def load_user_permissions(session: AsyncSession, user_id: int, tenant_id: Optional[int]) -> UserPermissionMask:
+    """加载用户有效权限位图（用户所有正常状态角色的权限并集）"""
+    version = permission_cache.version
+    index = permission_cache.get_index(tenant_id)
+    if index is None:
+        index = await load_tenant_index(session, tenant_id)
+        permission_cache.set_index(tenant_id, index, version)
+
+    role_sql = select(UserRoleModel.role_id).where(
+        UserRoleModel.user_id == user_id,
+        UserRoleModel.status == 0,  # 只查询正常状态的角色关联
+    ).execution_options(use_replica=True)
+    role_ids = (await session.execute(role_sql)).scalars().all()
+    return UserPermissionMask(index, index.mask_for_roles(role_ids))
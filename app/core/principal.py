@@ -0,0 +1,77 @@
+from typing import Optional
+from sqlmodel import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.system import UserModel, UserRoleModel
+from app.utils.cache import TTLCache
+
+
+class Principal:
+    """当前登录用户快照（仅包含鉴权所需字段）"""
+
+    __slots__ = ("id", "username", "tenant_id", "status", "role_id")
+
+    def __init__(
+        self,
+        id: int,
+        username: str,
+        tenant_id: Optional[int],
+        status: int,
+        role_id: Optional[int] = None,
+    ) -> None:
+        self.id = id
+        self.username = username
+        self.tenant_id = tenant_id
+        self.status = status
+        self.role_id = role_id  # 当前选中的角色ID
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, username={self.username!r}, tenant_id={self.tenant_id}, role_id={self.role_id})"
+
+
+# 用户快照缓存: (tenant_id, user_id) -> Principal
+principal_cache: TTLCache[tuple, Principal] = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """失效指定用户的快照缓存（用户状态、角色、基本信息变更或删除时调用）"""
+    principal_cache.evict(lambda key, _: key[1] == user_id)
+
+
+async def load_principal(session: AsyncSession, user_id: int, tenant_id: Optional[int]) -> Optional[Principal]:
+    """从数据库加载用户快照"""
+    sql = select(
+        UserModel.id,
+        UserModel.username,
+        UserModel.tenant_id,
+        UserModel.status,
+        UserRoleModel.role_id,
+    ).outerjoin(
+        UserRoleModel,
+        and_(
+            UserRoleModel.user_id == UserModel.id,
+            UserRoleModel.status == 5,  # 5表示选中状态
+            UserRoleModel.deleted == 0,
+        ),
+    ).where(
+        UserModel.id == user_id,
+        UserModel.deleted == 0,
+    )
+    if tenant_id is not None:
+        sql = sql.where(UserModel.tenant_id == tenant_id)
+    row = (await session.execute(sql.limit(1))).first()
+    if row is None:
+        return None
+    return Principal(*row)
+
+
+async def get_principal(session: AsyncSession, user_id: int, tenant_id: Optional[int]) -> Optional[Principal]:
+    """获取用户快照（优先读取缓存）"""
+    key = (tenant_id, user_id)
+    principal = principal_cache.get(key)
+    if principal is None:
+        principal = await load_principal(session, user_id, tenant_id)
+        if principal is not None:
+            principal_cache.set(key, principal)
+    return principal
@@ -1,6 +1,9 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 import hashlib
-from typing import Tuple, Optional
+import time
+from typing import Any, Callable, Dict, Tuple, Optional
 
 from fastapi.security import HTTPBearer
 from jose import JWTError, jwt
@@ -8,6 +11,7 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 from app.core.system_context import SystemContext
+from app.utils.cache import TTLCache
 
 
 # 密码加密上下文
@@ -32,6 +36,93 @@ def get_password_hash(password: str) -> str:
     """获取密码哈希"""
     return pwd_context.hash(password)
 
+class PasswordHashPool:
+    """
+    密码哈希执行池
+    bcrypt 单次计算约数百毫秒，放到线程/进程池中执行，避免阻塞事件循环；
+    通过信号量限制同时提交的任务数，超出部分在事件循环中排队
+    """
+
+    def __init__(self, executor_type: str, workers: int, max_concurrency: int) -> None:
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # 统计指标
+        self.waiting = 0           # 排队等待中的任务数
+        self.running = 0           # 执行中的任务数
+        self.completed = 0         # 已完成的任务数
+        self.max_waiting = 0       # 历史最大排队数
+        self.total_wait_time = 0.0 # 累计排队时间（秒）
+        self.total_run_time = 0.0  # 累计执行时间（秒）
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """在执行池中运行 func(*args)"""
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.total_wait_time += started_at - queued_at
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.total_run_time += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """执行池统计信息"""
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "max_waiting": self.max_waiting,
+            "avg_wait_ms": round(self.total_wait_time / self.completed * 1000, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_time / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """关闭执行池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# 全局密码哈希执行池
+password_hash_pool = PasswordHashPool(
+    settings.password_hash_executor,
+    settings.password_hash_workers,
+    settings.password_hash_max_concurrency,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """验证密码（在执行池中运行，不阻塞事件循环）"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """获取密码哈希（在执行池中运行，不阻塞事件循环）"""
+    return await password_hash_pool.run(get_password_hash, password)
+
 def get_token_hash(token: str) -> str:
     """返回给定Token的哈希值"""
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -53,12 +144,23 @@ def create_tokens(data: dict) -> Tuple[str, str]:
     
     return access_token, refresh_token
 
+# 已验证访问令牌缓存: Token哈希 -> 令牌载荷，条目在令牌过期时失效
+access_token_cache: TTLCache[str, dict] = TTLCache(settings.token_cache_size, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
 def verify_access_token(token: str, credentials_exception):
     """验证访问令牌"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != "access":
-            raise credentials_exception
+        token_hash = get_token_hash(token)
+        payload = access_token_cache.get(token_hash)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            if payload.get("type") != "access":
+                raise credentials_exception
+            # 缓存至令牌过期时间
+            ttl = payload.get("exp", 0) - time.time()
+            if ttl > 0:
+                access_token_cache.set(token_hash, payload, ttl)
         # 从令牌中获取租户ID和用户ID并设置上下文
         user_id = int(payload.get("user_id"))
         SystemContext.set_user_id(user_id)
@@ -0,0 +1,54 @@
+from typing import Dict, Optional
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.models.system import TenantModel, TenantShardModel
+
+# 未分配分库的租户及平台级数据所在的库
+PRIMARY_SHARD = "primary"
+
+# 仅存于主库的目录表，无论当前租户属于哪个分库都走主库
+CATALOG_MODELS = (TenantModel, TenantShardModel)
+
+
+class ShardMap:
+    """
+    租户分库映射
+    - 配置: tenant_shards 的键为租户ID或租户编码，编码在 load 时解析为ID
+    - 持久化: 主库 sys_tenant_shard 表（迁移租户时写入），优先级高于配置
+    """
+
+    def __init__(self, tenant_shards: Dict[str, str]) -> None:
+        self._configured_ids: Dict[int, str] = {}
+        self._configured_codes: Dict[str, str] = {}
+        for key, shard in tenant_shards.items():
+            if key.isdigit():
+                self._configured_ids[int(key)] = shard
+            else:
+                self._configured_codes[key] = shard
+        self._tenants: Dict[int, str] = dict(self._configured_ids)
+
+    def shard_for(self, tenant_id: Optional[int]) -> str:
+        """租户所在分库名称"""
+        if tenant_id is None:
+            return PRIMARY_SHARD
+        return self._tenants.get(tenant_id, PRIMARY_SHARD)
+
+    def assign(self, tenant_id: int, shard: str) -> None:
+        self._tenants[tenant_id] = shard
+
+    def assignments(self) -> Dict[int, str]:
+        return dict(self._tenants)
+
+    async def load(self, conn: AsyncConnection) -> None:
+        """从主库重新加载映射（配置 + 编码解析 + sys_tenant_shard）"""
+        tenants = dict(self._configured_ids)
+        if self._configured_codes:
+            rows = await conn.execute(
+                select(TenantModel.id, TenantModel.code).where(TenantModel.code.in_(self._configured_codes))
+            )
+            for tenant_id, code in rows:
+                tenants[tenant_id] = self._configured_codes[code]
+        rows = await conn.execute(select(TenantShardModel.tenant_id, TenantShardModel.shard))
+        tenants.update(dict(rows.all()))
+        self._tenants = tenants
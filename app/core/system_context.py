@@ -7,6 +7,8 @@ from app.models.system import TenantModel
 system_context: ContextVar[Optional[TenantModel]] = ContextVar('system_context', default=None)
 tenant_id_context: ContextVar[Optional[int]] = ContextVar('tenant_id_context', default=None)
 user_id_context: ContextVar[Optional[int]] = ContextVar('user_id_context', default=None)
+request_id_context: ContextVar[Optional[str]] = ContextVar('request_id_context', default=None)
+read_only_context: ContextVar[bool] = ContextVar('read_only_context', default=False)
 
 
 class SystemContext:
@@ -28,6 +30,16 @@ class SystemContext:
         """设置当前用户ID"""
         user_id_context.set(user_id)
     
+    @staticmethod
+    def set_request_id(request_id: str) -> None:
+        """设置当前请求ID"""
+        request_id_context.set(request_id)
+    
+    @staticmethod
+    def set_read_only(read_only: bool) -> None:
+        """设置当前请求是否只读（只读请求的查询可路由到只读副本）"""
+        read_only_context.set(read_only)
+    
     @staticmethod
     def get_tenant() -> Optional[TenantModel]:
         """获取当前租户"""
@@ -43,9 +55,21 @@ class SystemContext:
         """获取当前用户ID"""
         return user_id_context.get()
     
+    @staticmethod
+    def get_request_id() -> Optional[str]:
+        """获取当前请求ID"""
+        return request_id_context.get()
+    
+    @staticmethod
+    def is_read_only() -> bool:
+        """当前请求是否只读"""
+        return read_only_context.get()
+    
     @staticmethod
     def clear() -> None:
         """清除系统上下文"""
         system_context.set(None)
         tenant_id_context.set(None)
-        user_id_context.set(None)
\ No newline at end of file
+        user_id_context.set(None)
+        request_id_context.set(None)
+        read_only_context.set(False)
\ No newline at end of file
@@ -1,10 +1,27 @@
 from sqlmodel import select
-from app.core.db import AsyncSession
-from app.models.system import TenantModel, UserModel, RoleModel, PermissionModel, DeptModel, PostModel
-from app.core.security import get_password_hash
+from app.core.config import settings
+from app.core.db import AsyncSession, async_db
+from app.core.migrations import advisory_lock
+from app.models.system import TenantModel, UserModel, UserDeptModel, RoleModel, PermissionModel, DeptModel, PostModel
+from app.core.security import get_password_hash_async
 from app.core.logger import logger
 
 
+SEED_LOCK = "zeno:seed"
+
+
+async def seed_default_tenant():
+    """启动时初始化默认数据：已存在时只执行一次查询；否则加锁后二次确认再初始化，避免多进程重复写入"""
+    async with async_db as session:
+        result = await session.execute(select(TenantModel.id).where(TenantModel.code == "default"))
+        if result.scalar_one_or_none() is not None:
+            return
+    async with async_db.async_engine.connect() as conn:
+        async with advisory_lock(conn, SEED_LOCK, settings.db_migration_lock_timeout):
+            async with async_db as session:
+                await init_default_tenant(session)
+
+
 async def init_default_tenant(session: AsyncSession):
     """初始化默认租户和基础数据"""
     
@@ -27,8 +44,8 @@ async def init_default_tenant(session: AsyncSession):
         remark="系统默认租户"
     )
     session.add(default_tenant)
-    await session.commit()
-    await session.refresh(default_tenant)
+    # 只 flush 获取主键，全部数据在最后一次性提交
+    await session.flush()
     
     logger.info(f"创建默认租户成功，ID: {default_tenant.id}")
     
@@ -43,8 +60,7 @@ async def init_default_tenant(session: AsyncSession):
         status=0
     )
     session.add(default_dept)
-    await session.commit()
-    await session.refresh(default_dept)
+    await session.flush()
     
     # 创建默认岗位
     default_post = PostModel(
@@ -55,8 +71,7 @@ async def init_default_tenant(session: AsyncSession):
         status=0
     )
     session.add(default_post)
-    await session.commit()
-    await session.refresh(default_post)
+    await session.flush()
     
     # 创建默认角色
     admin_role = RoleModel(
@@ -66,27 +81,27 @@ async def init_default_tenant(session: AsyncSession):
         status=0
     )
     session.add(admin_role)
-    await session.commit()
-    await session.refresh(admin_role)
+    await session.flush()
     
     # 创建默认用户
     admin_user = UserModel(
         tenant_id=default_tenant.id,
         username="admin",
-        password=get_password_hash("admin123"),
+        password=await get_password_hash_async("admin123"),
         nickname="系统管理员",
         email="admin@example.com",
         status=0,
-        dept_ids=[default_dept.id],
         post_id=default_post.id
     )
     session.add(admin_user)
-    await session.commit()
-    await session.refresh(admin_user)
+    await session.flush()
+    session.add(UserDeptModel(tenant_id=default_tenant.id, user_id=admin_user.id, dept_id=default_dept.id))
     
     # 创建基础权限菜单
     await create_default_permissions(session, default_tenant.id)
     
+    # 单个事务提交，中途失败不会留下不完整的默认数据
+    await session.commit()
     logger.info("默认租户初始化完成")
     return default_tenant
 
@@ -108,8 +123,7 @@ async def create_default_permissions(session: AsyncSession, tenant_id: int):
         remark="系统管理模块"
     )
     session.add(system_menu)
-    await session.commit()
-    await session.refresh(system_menu)
+    await session.flush()
     
     # 用户管理
     user_menu = PermissionModel(
@@ -231,5 +245,5 @@ async def create_default_permissions(session: AsyncSession, tenant_id: int):
     )
     session.add(tenant_menu)
     
-    await session.commit()
+    await session.flush()
     logger.info("默认权限菜单创建完成")
@@ -1,3 +1,4 @@
 # app/models/__init__.py
 from . import common
-from . import system
\ No newline at end of file
+from . import system
+from . import archive
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+逻辑删除数据归档表
+- 与原表列相同（保留原主键ID，不含外键及二级索引），附加归档时间 archived_at
+- 主表归档时其关联表（用户角色、用户部门、角色权限）的记录一并归档，恢复时再移回
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Table
+from sqlmodel import SQLModel
+
+from app.models.system import (
+    DeptModel, PermissionModel, PostModel, RoleModel, RolePermissionModel, UserDeptModel, UserModel, UserRoleModel,
+)
+
+
+def _archive_table(model) -> Table:
+    source = model.__table__
+    name = f"{source.name}_archive"
+    columns = [
+        Column(
+            column.name, column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,
+            nullable=column.nullable,
+            server_default=column.server_default.arg if column.server_default is not None else None,
+            comment=column.comment,
+        )
+        for column in source.columns
+    ]
+    return Table(
+        name, SQLModel.metadata, *columns,
+        Column("archived_at", DateTime, nullable=False, default=datetime.now, comment="归档时间"),
+        Index(f"ix_{name}_tenant_archived", "tenant_id", "archived_at"),
+        comment=f"{source.comment or source.name}（归档）",
+    )
+
+
+# 可归档的主表 -> 随之归档的关联表及关联列，归档顺序: 岗位最后（用户归档后才不再被引用）
+ARCHIVE_LINKS: Dict[type, List[Tuple[type, str]]] = {
+    UserModel: [(UserRoleModel, "user_id"), (UserDeptModel, "user_id")],
+    RoleModel: [(UserRoleModel, "role_id"), (RolePermissionModel, "role_id")],
+    PermissionModel: [(RolePermissionModel, "perm_id")],
+    DeptModel: [(UserDeptModel, "dept_id")],
+    PostModel: [],
+}
+
+# 原表名 -> 归档表
+ARCHIVE_TABLES: Dict[str, Table] = {
+    model.__tablename__: _archive_table(model)
+    for model in (*ARCHIVE_LINKS, UserRoleModel, UserDeptModel, RolePermissionModel)
+}
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, computed_field, field_validator
+from sqlalchemy import text
+from sqlalchemy.orm import declared_attr
 from sqlmodel import SQLModel, Field
 from datetime import datetime
-from typing import Generic, List, Optional, Dict, Any, TypeVar
+from typing import ClassVar, Generic, List, Literal, Optional, Dict, Any, Tuple, TypeVar
 
 class BaseTable(SQLModel, table=False): 
     """所有数据库表的基类，包含通用字段"""
@@ -18,11 +20,58 @@ class BaseTable(SQLModel, table=False):
     )
     deleted: int = Field(default=0,description="逻辑删除(0:未删除 1:已删除)",sa_column_kwargs={"comment": "逻辑删除(0:未删除 1:已删除)"})
     
+
+class VersionedTable(BaseTable, table=False):
+    """
+    带版本号的表（乐观锁）
+    - 映射为 version_id_col: 会话提交对象修改时自动递增版本号，并以 WHERE version=原版本 校验，冲突时抛出 StaleDataError
+    - update_by_id 的单语句更新同样递增版本号
+    """
+
+    version: int = Field(default=0,description="版本号",sa_column_kwargs={"server_default": text("0"), "comment": "版本号"})
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict:
+        return {"version_id_col": cls.__table__.c.version}
+
     
-class BasePageQuery(BaseModel):
+class FieldsQuery(BaseModel):
+    """稀疏字段查询参数（列表及分页接口共用，未声明 FIELDS 的子类不允许选择字段）"""
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="只返回指定字段，逗号分隔（如 id,username,nickname），需在实体的可选字段内；未指定时返回完整数据",
+    )
+
+    # 可通过 fields 选择的列，由各实体的查询参数声明
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def check_fields(cls, fields):
+        from app.utils.fieldsets import parse_fields  # 避免循环导入
+        return parse_fields(fields, cls.FIELDS)
+
+
+class BasePageQuery(FieldsQuery):
     """分页查询基础数据"""
     page_num: int = Field(default=1, description="页码", ge=1)
     page_size: int = Field(default=10, description="数量", ge=1)
+    cursor: Optional[str] = Field(
+        default=None,
+        description="游标分页: 传空字符串取第一页，之后传上一页返回的 next_cursor；指定时忽略 page_num",
+    )
+    count: Optional[Literal["exact", "estimate", "none"]] = Field(
+        default=None,
+        description="总数统计方式: exact 精确(带缓存) / estimate 按执行计划估算 / none 不统计；默认页码分页为 exact，游标分页为 none",
+    )
+
+    @field_validator("cursor")
+    @classmethod
+    def check_cursor(cls, cursor: Optional[str]) -> Optional[str]:
+        if cursor:
+            from app.utils.pagination import decode_cursor  # 避免循环导入
+            decode_cursor(cursor)
+        return cursor
 
     @computed_field
     @property
@@ -55,8 +104,10 @@ class BaseResponse(BaseModel, Generic[T]):
 class PageResponse(BaseModel, Generic[T]):
     page_num: int = Field(1, description="当前页码")
     page_size: int = Field(10, description="每页数量")
-    total: int = Field(0, description="总记录数")
+    total: Optional[int] = Field(0, description="总记录数（未统计时为 null）")
+    total_exact: Optional[bool] = Field(None, description="总数是否精确（estimate 估算时为 false）")
     items: List[T] = Field([], description="分页数据")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页时返回，为 null 表示没有更多数据）")
 
 
 class Token(BaseModel):
@@ -1,13 +1,17 @@
 from typing import List, Optional
-from sqlmodel import JSON, Field, Relationship, SQLModel
-from sqlalchemy import UniqueConstraint, Column, String, Integer, Date, Boolean, Text
-from app.models.common import BaseTable
+from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import UniqueConstraint, Index, Column, String, Integer, Date, Boolean, Text
+from app.models.common import BaseTable, VersionedTable
 from datetime import datetime, date
 
 
-class TenantModel(BaseTable, table=True):
+class TenantModel(VersionedTable, table=True):
     __tablename__ = "sys_tenant"
-    __table_args__ = {"comment": "租户表"}
+    __table_args__ = (
+        Index("ix_sys_tenant_code", "code"),
+        Index("ix_sys_tenant_domain", "domain"),
+        {"comment": "租户表"},
+    )
     
     """租户表"""
     name: str = Field(max_length=100, description="租户名称", sa_column_kwargs={"comment": "租户名称"})
@@ -27,9 +31,12 @@ class TenantModel(BaseTable, table=True):
     roles: List["RoleModel"] = Relationship(back_populates="tenant")
     permissions: List["PermissionModel"] = Relationship(back_populates="tenant")
 
-class PostModel(BaseTable, table=True):
+class PostModel(VersionedTable, table=True):
     __tablename__ = "sys_post"
-    __table_args__ = {"comment": "岗位表"}
+    __table_args__ = (
+        Index("ix_sys_post_tenant_deleted_sort", "tenant_id", "deleted", "sort"),
+        {"comment": "岗位表"},
+    )
     
     """岗位表"""
     name: str = Field(max_length=50, description="岗位名称", sa_column_kwargs={"comment": "岗位名称"})
@@ -41,9 +48,12 @@ class PostModel(BaseTable, table=True):
     users: List["UserModel"] = Relationship(back_populates="post")
 
 
-class DeptModel(BaseTable, table=True):
+class DeptModel(VersionedTable, table=True):
     __tablename__ = "sys_dept"
-    __table_args__ = {"comment": "部门表"}
+    __table_args__ = (
+        Index("ix_sys_dept_tenant_deleted_pid", "tenant_id", "deleted", "pid"),
+        {"comment": "部门表"},
+    )
     
     """部门表"""
     name: str = Field(max_length=50, description="部门名称", sa_column_kwargs={"comment": "部门名称"})
@@ -62,9 +72,14 @@ class DeptModel(BaseTable, table=True):
 
 
 
-class UserModel(BaseTable, table=True):
+class UserModel(VersionedTable, table=True):
     __tablename__ = "sys_user"
-    __table_args__ = {"comment": "注册用户表"}
+    __table_args__ = (
+        Index("uq_sys_user_tenant_username", "tenant_id", "username", unique=True),  # 逻辑删除的账号同样占用
+        Index("ix_sys_user_tenant_deleted_create_time", "tenant_id", "deleted", "create_time"),
+        Index("ix_sys_user_username", "username"),  # 未指定租户登录时按账号查找
+        {"comment": "注册用户表"},
+    )
 
     """用户表"""
     username: str = Field(max_length=20, description="账号", sa_column_kwargs={"comment": "账号"})
@@ -74,7 +89,6 @@ class UserModel(BaseTable, table=True):
     email: Optional[str] = Field(default=None, description="邮箱", sa_column_kwargs={"comment": "邮箱"})
     phone: Optional[str] = Field(default=None, description="手机号", sa_column_kwargs={"comment": "手机号"})
     status: int = Field(default=0, description="状态(0:正常 1:禁用)", sa_column_kwargs={"comment": "状态(0:正常 1:禁用)"})
-    dept_ids: Optional[List[int]] = Field(default=None,sa_type=JSON, description="部门列表", sa_column_kwargs={"comment": "部门列表"})
     post_id: Optional[int] = Field(default=None, foreign_key="sys_post.id", description="岗位ID", sa_column_kwargs={"comment": "岗位ID"})
 
     # 定义与租户的关联关系
@@ -85,9 +99,12 @@ class UserModel(BaseTable, table=True):
 
 
 
-class RoleModel(BaseTable, table=True):
+class RoleModel(VersionedTable, table=True):
     __tablename__ = "sys_role"
-    __table_args__ = {"comment": "角色表"}
+    __table_args__ = (
+        Index("ix_sys_role_tenant_deleted_create_time", "tenant_id", "deleted", "create_time"),
+        {"comment": "角色表"},
+    )
     
     """角色表"""
     name: str = Field(max_length=50, description="角色名称", sa_column_kwargs={"comment": "角色名称"})
@@ -102,9 +119,13 @@ class RoleModel(BaseTable, table=True):
     permissions: List["RolePermissionModel"] = Relationship(back_populates="role")
 
 
-class PermissionModel(BaseTable, table=True):
+class PermissionModel(VersionedTable, table=True):
     __tablename__ = "sys_perm"
-    __table_args__ = {"comment": "权限表"}
+    __table_args__ = (
+        Index("ix_sys_perm_tenant_deleted_pid", "tenant_id", "deleted", "pid"),
+        Index("ix_sys_perm_tenant_deleted_identifier", "tenant_id", "deleted", "identifier"),
+        {"comment": "权限表"},
+    )
     
     """权限表"""
     pid: Optional[int] = Field(default=None, description="父级ID", sa_column_kwargs={"comment": "父级ID"})
@@ -130,7 +151,11 @@ class PermissionModel(BaseTable, table=True):
 
 class UserRoleModel(BaseTable, table=True):
     __tablename__ = "sys_user_role"
-    __table_args__ = {"comment": "用户角色关联表"}
+    __table_args__ = (
+        Index("ix_sys_user_role_user_status", "user_id", "status"),
+        Index("ix_sys_user_role_role", "role_id"),
+        {"comment": "用户角色关联表"},
+    )
     
     """用户角色关联表"""
     user_id: int = Field(foreign_key="sys_user.id", description="用户ID", sa_column_kwargs={"comment": "用户ID"})
@@ -141,9 +166,26 @@ class UserRoleModel(BaseTable, table=True):
     role: RoleModel = Relationship(back_populates="users")
 
 
+class UserDeptModel(BaseTable, table=True):
+    __tablename__ = "sys_user_dept"
+    __table_args__ = (
+        Index("uq_sys_user_dept_user_dept", "user_id", "dept_id", unique=True),
+        Index("ix_sys_user_dept_dept_user", "dept_id", "user_id"),
+        {"comment": "用户部门关联表"},
+    )
+
+    """用户部门关联表（移除成员时物理删除）"""
+    user_id: int = Field(foreign_key="sys_user.id", description="用户ID", sa_column_kwargs={"comment": "用户ID"})
+    dept_id: int = Field(foreign_key="sys_dept.id", description="部门ID", sa_column_kwargs={"comment": "部门ID"})
+
+
 class RolePermissionModel(BaseTable, table=True):
     __tablename__ = "sys_role_perm"
-    __table_args__ = {"comment": "角色权限关联表"}
+    __table_args__ = (
+        Index("ix_sys_role_perm_role_perm", "role_id", "perm_id"),
+        Index("ix_sys_role_perm_perm", "perm_id"),
+        {"comment": "角色权限关联表"},
+    )
     
     """角色权限关联表"""
     role_id: int = Field(foreign_key="sys_role.id", description="角色ID", sa_column_kwargs={"comment": "角色ID"})
@@ -176,4 +218,27 @@ class AuditLogModel(SQLModel, table=True):
     error_message: Optional[str] = Field(default=None, description="错误信息", sa_column_kwargs={"comment": "错误信息"})
     operation_time: datetime = Field(default_factory=datetime.now, description="操作时间", sa_column_kwargs={"comment": "操作时间"})
     created_at: Optional[datetime] = Field(default_factory=datetime.now, description="创建时间", sa_column_kwargs={"comment": "创建时间"})
-    updated_at: Optional[datetime] = Field(default_factory=datetime.now, description="更新时间", sa_column_kwargs={"comment": "更新时间"})
\ No newline at end of file
+    updated_at: Optional[datetime] = Field(default_factory=datetime.now, description="更新时间", sa_column_kwargs={"comment": "更新时间"})
+
+class TenantShardModel(SQLModel, table=True):
+    __tablename__ = "sys_tenant_shard"
+    __table_args__ = {"comment": "租户分库映射表"}
+    
+    """租户分库映射表（仅存于主库，迁移租户时写入，优先于配置文件）"""
+    tenant_id: int = Field(primary_key=True, foreign_key="sys_tenant.id", description="租户ID", sa_column_kwargs={"comment": "租户ID"})
+    shard: str = Field(max_length=50, description="分库名称", sa_column_kwargs={"comment": "分库名称"})
+    update_time: Optional[datetime] = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"onupdate": datetime.now, "comment": "更新时间"},
+        description="更新时间",
+    )
+
+
+class SchemaVersionModel(SQLModel, table=True):
+    __tablename__ = "sys_schema_version"
+    __table_args__ = {"comment": "数据库结构版本表"}
+    
+    """数据库结构版本表（每个已执行的迁移一行）"""
+    version: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False, "comment": "版本号"}, description="版本号")
+    description: Optional[str] = Field(default=None, max_length=200, description="迁移说明", sa_column_kwargs={"comment": "迁移说明"})
+    applied_at: datetime = Field(default_factory=datetime.now, description="执行时间", sa_column_kwargs={"comment": "执行时间"})
@@ -1,19 +1,23 @@
 from typing import Dict, List, Optional
-from sqlmodel import select
+from sqlmodel import delete, select
 from app.core.db import AsyncSession
 from app.core.logger import LoggerDep
-from app.models.system import DeptModel
+from app.models.system import DeptModel, UserDeptModel
 from app.utils.tree import build_tree
 from app.core.system_context import SystemContext
+from app.utils.fieldsets import fetch_fields
+from app.utils.writes import update_by_id
 
 class DeptService:
     def __init__(self, session: AsyncSession, logger: LoggerDep) -> None:
         self.session = session
         self.logger = logger
 
-    async def lists(self) -> List[DeptModel]:
-        """获取所有部门"""
-        sql = select(DeptModel)
+    async def lists(self, fields: Optional[List[str]] = None) -> List[DeptModel] | List[dict]:
+        """获取所有部门，指定 fields 时只查询这些列"""
+        sql = select(DeptModel).execution_options(use_replica=True)
+        if fields:
+            return await fetch_fields(self.session, sql, DeptModel, fields)
         result = await self.session.execute(sql)
         return result.scalars().all()
 
@@ -36,27 +40,20 @@ class DeptService:
         return dept
 
     async def update_dept(self, dept_data: dict) -> DeptModel | None:
-        """更新部门"""
+        """更新部门（传入 version 时校验乐观锁）"""
         dept_id = dept_data.pop("id")
-        dept = await self.get_dept_by_id(dept_id)
+        version = dept_data.pop("version", None)
+        dept = await update_by_id(self.session, DeptModel, dept_id, dept_data, version)
         if not dept:
             return None
-            
-        for key, value in dept_data.items():
-            setattr(dept, key, value)
-            
         await self.session.commit()
-        await self.session.refresh(dept)
         return dept
 
     async def delete_dept(self, dept_id: int) -> bool:
         """逻辑删除部门"""
-        dept = await self.get_dept_by_id(dept_id)
-        if not dept:
-            return False
-            
         # 设置逻辑删除标志
-        dept.deleted = 1
+        if not await update_by_id(self.session, DeptModel, dept_id, {"deleted": 1}, returning=False):
+            return False
         await self.session.commit()
         return True
 
@@ -64,7 +61,7 @@ class DeptService:
         """获取部门树结构
         :param dept_id: 部门ID，如果为None则返回完整树结构
         """
-        sql = select(DeptModel)
+        sql = select(DeptModel).execution_options(use_replica=True)
         result = await self.session.execute(sql)
         depts = result.scalars().all()
         
@@ -88,22 +85,30 @@ class DeptService:
         error_count = 0
         errors = []
         
-        # 先删除remark字段包含"从钉钉导入"字符串的数据
+        # 之前从钉钉导入的部门按ID原地更新（保留 sys_user_dept 成员关系），
+        # 本次不再包含的部门连同其成员关系在同一事务中删除
+        imported = DeptModel.remark.like("%从钉钉导入%")
+        final_ids = [self._import_dept_id(dept_info) for dept_info in dept_data if dept_info.get('name') and dept_info.get('id')]
         try:
-            from sqlmodel import delete
-            delete_sql = delete(DeptModel).where(DeptModel.remark.like("%从钉钉导入%"))
-            await self.session.execute(delete_sql)
-            await self.session.commit()
-            self.logger.info("已删除之前从钉钉导入的部门数据")
+            stale_ids = select(DeptModel.id).where(imported, DeptModel.id.notin_(final_ids)).execution_options(include_deleted=True)
+            stale_ids = (await self.session.execute(stale_ids)).scalars().all()
+            if stale_ids:
+                await self.session.execute(delete(UserDeptModel).where(UserDeptModel.dept_id.in_(stale_ids)))
+                await self.session.execute(delete(DeptModel).where(DeptModel.id.in_(stale_ids)).execution_options(include_deleted=True))
+                await self.session.commit()
+                self.logger.info(f"已删除 {len(stale_ids)} 个不再从钉钉导入的部门")
         except Exception as e:
+            await self.session.rollback()
             self.logger.error(f"删除之前从钉钉导入的部门数据失败: {str(e)}")
             error_count += 1
             errors.append(f"删除之前从钉钉导入的部门数据失败: {str(e)}")
+        sql = select(DeptModel).where(imported, DeptModel.id.in_(final_ids)).execution_options(include_deleted=True)
+        existing = {dept.id: dept for dept in (await self.session.execute(sql)).scalars().all()}
         
         # 创建ID映射字典，用于处理parentid到pid的转换
         id_mapping = {}
         
-        # 先创建所有部门，使用钉钉的部门ID作为数据库主键
+        # 先创建（或更新）所有部门，使用钉钉的部门ID作为数据库主键
         for dept_info in dept_data:
             try:
                 # 提取JSON中的部门信息
@@ -116,25 +121,26 @@ class DeptService:
                     errors.append(f"部门ID {dept_id}: 缺少部门名称或ID")
                     continue
                 
-                # 特殊处理：当部门名称为"拓尔思天行网安信息技术有限责任公司"时，ID设置为99999
-                if name == "拓尔思天行网安信息技术有限责任公司":
-                    final_dept_id = 99999
-                else:
-                    final_dept_id = dept_id
-                
-                # 创建部门模型，使用处理后的部门ID
-                dept_model = DeptModel(
-                    id=final_dept_id,
+                final_dept_id = self._import_dept_id(dept_info)
+                values = dict(
                     name=name,
                     remark=f"从钉钉导入 - 原ID: {dept_id}",
                     pid=None,  # 先设为None，后续更新
                     level=1,   # 默认层级，后续会根据父级调整
                     sort=0,
-                    status=0
+                    status=0,
+                    deleted=0,
                 )
-                
-                self.session.add(dept_model)
-                await self.session.flush()  # 刷新以获取生成的ID
+                dept_model = existing.get(final_dept_id)
+                if dept_model is not None:
+                    # 已导入过的部门原地更新
+                    for key, value in values.items():
+                        setattr(dept_model, key, value)
+                else:
+                    # 创建部门模型，使用处理后的部门ID
+                    dept_model = DeptModel(id=final_dept_id, **values)
+                    self.session.add(dept_model)
+                await self.session.flush()
                 
                 # 记录ID映射关系（钉钉ID -> 最终数据库ID）
                 id_mapping[dept_id] = final_dept_id
@@ -195,6 +201,14 @@ class DeptService:
             "errors": errors
         }
     
+    @staticmethod
+    def _import_dept_id(dept_info: dict) -> int:
+        """导入部门使用的主键ID"""
+        # 特殊处理：当部门名称为"拓尔思天行网安信息技术有限责任公司"时，ID设置为99999
+        if dept_info.get('name') == "拓尔思天行网安信息技术有限责任公司":
+            return 99999
+        return dept_info.get('id')
+
     async def _set_dept_leaders(self, dept_data: List[dict], id_mapping: dict, errors: list) -> None:
         """设置部门负责人
         :param dept_data: 部门数据列表
@@ -5,6 +5,8 @@ from app.core.logger import LoggerDep
 from app.models.system import PermissionModel
 from app.utils.tree import build_tree
 from app.core.system_context import SystemContext
+from app.core.permission import permission_cache
+from app.utils.writes import update_by_id
 
 class MenuService:
     def __init__(self, session: AsyncSession, logger: LoggerDep) -> None:
@@ -13,7 +15,7 @@ class MenuService:
 
     async def lists(self) -> List[PermissionModel]:
         """获取所有菜单"""
-        sql = select(PermissionModel)
+        sql = select(PermissionModel).execution_options(use_replica=True)
         result = await self.session.execute(sql)
         return result.scalars().all()
 
@@ -37,33 +39,30 @@ class MenuService:
         return menu
 
     async def update_menu(self, menu_data: dict) -> PermissionModel | None:
-        """更新菜单"""
+        """更新菜单（传入 version 时校验乐观锁）"""
         menu_id = menu_data.pop("id")
-        menu = await self.get_menu_by_id(menu_id)
+        version = menu_data.pop("version", None)
+        menu = await update_by_id(self.session, PermissionModel, menu_id, menu_data, version)
         if not menu:
             return None
-            
-        for key, value in menu_data.items():
-            setattr(menu, key, value)
-            
         await self.session.commit()
-        await self.session.refresh(menu)
+        # 权限标识或状态变更，失效该租户的权限缓存
+        permission_cache.invalidate_tenant(menu.tenant_id)
         return menu
 
     async def delete_menu(self, menu_id: int) -> bool:
         """逻辑删除菜单"""
-        menu = await self.get_menu_by_id(menu_id)
+        # 设置逻辑删除标志
+        menu = await update_by_id(self.session, PermissionModel, menu_id, {"deleted": 1})
         if not menu:
             return False
-            
-        # 设置逻辑删除标志
-        menu.deleted = 1
         await self.session.commit()
+        permission_cache.invalidate_tenant(menu.tenant_id)
         return True
 
     async def get_menu_tree(self) -> List[dict]:
         """获取菜单树结构"""
-        sql = select(PermissionModel)
+        sql = select(PermissionModel).execution_options(use_replica=True)
         result = await self.session.execute(sql)
         menus = result.scalars().all()
         return build_tree([menu.model_dump() for menu in menus])
\ No newline at end of file
@@ -5,6 +5,7 @@ from app.core.logger import LoggerDep
 from app.models.system import PostModel
 from app.utils.tree import build_tree
 from app.core.system_context import SystemContext
+from app.utils.writes import update_by_id
 
 class PostService:
     def __init__(self, session: AsyncSession, logger: LoggerDep) -> None:
@@ -13,7 +14,7 @@ class PostService:
 
     async def lists(self) -> List[PostModel]:
         """获取所有岗位"""
-        sql = select(PostModel).where(PostModel.deleted == 0)
+        sql = select(PostModel).where(PostModel.deleted == 0).execution_options(use_replica=True)
         result = await self.session.execute(sql)
         return result.scalars().all()
 
@@ -36,26 +37,19 @@ class PostService:
         return post
 
     async def update_post(self, post_data: dict) -> PostModel | None:
-        """更新岗位"""
+        """更新岗位（传入 version 时校验乐观锁）"""
         post_id = post_data.pop("id")
-        post = await self.get_post_by_id(post_id)
+        version = post_data.pop("version", None)
+        post = await update_by_id(self.session, PostModel, post_id, post_data, version)
         if not post:
             return None
-            
-        for key, value in post_data.items():
-            setattr(post, key, value)
-            
         await self.session.commit()
-        await self.session.refresh(post)
         return post
 
     async def delete_post(self, post_id: int) -> bool:
         """逻辑删除岗位"""
-        post = await self.get_post_by_id(post_id)
-        if not post:
-            return False
-            
         # 设置逻辑删除标志
-        post.deleted = 1
+        if not await update_by_id(self.session, PostModel, post_id, {"deleted": 1}, returning=False):
+            return False
         await self.session.commit()
         return True
\ No newline at end of file
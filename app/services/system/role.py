@@ -1,12 +1,17 @@
+from datetime import datetime
 from typing import List
-from sqlmodel import delete, select, func
+from sqlmodel import select
 from app.api.vo.system.role import RolePageQuery
 from app.core.db import AsyncSession
 from app.core.logger import LoggerDep
 from app.models.common import PageResponse
 from app.models.system import PermissionModel, RoleModel, RolePermissionModel
 from app.utils.tree import build_tree
+from app.utils.pagination import paginate
+from app.utils.relations import sync_links
+from app.utils.writes import check_version, commit_versioned, update_by_id
 from app.core.system_context import SystemContext
+from app.core.permission import permission_cache
 
 class RoleService:
     def __init__(self, session: AsyncSession, logger: LoggerDep) -> None:
@@ -15,7 +20,7 @@ class RoleService:
 
     async def lists(self) -> List[RoleModel]:
         """获取所有角色"""
-        sql = select(RoleModel)
+        sql = select(RoleModel).execution_options(use_replica=True)
         result = await self.session.execute(sql)
         return result.scalars().all()
 
@@ -27,34 +32,8 @@ class RoleService:
         if page_query.name:
             query = query.where(RoleModel.name.contains(page_query.name))
             
-        # 计算总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.session.scalar(count_query)
-        
-        # 处理空数据情况
-        if total == 0:
-            return PageResponse[RoleModel](
-                page_num=page_query.page_num,
-                page_size=page_query.page_size,
-                total=total,
-                items=[]
-            )
-        
-        # 查询分页数据
-        sql = query\
-            .offset(page_query.offset)\
-            .limit(page_query.limit)\
-            .order_by(RoleModel.create_time.desc())
-        
-        result = await self.session.execute(sql)
-        roles = result.scalars().all()
-        
-        return PageResponse[RoleModel](
-            page_num=page_query.page_num,
-            page_size=page_query.page_size,
-            total=total,
-            items=roles
-        )
+        # 页码或游标分页
+        return await paginate(self.session, query, RoleModel, page_query)
 
 
     async def get_role_by_id(self, role_id: int) -> RoleModel | None:
@@ -71,52 +50,55 @@ class RoleService:
             role.tenant_id = tenant_id
         
         self.session.add(role)
+        await self.session.flush()
+        # 如果提供了权限ID列表，创建角色权限关联（与角色同一事务）
+        if menu_ids:
+            await self.set_role_permissions(role.id, role.tenant_id, menu_ids)
         await self.session.commit()
         await self.session.refresh(role)
-        # 如果提供了权限ID列表，创建角色权限关联
-        if menu_ids:
-            role_permissions = [
-                RolePermissionModel(role_id=role.id, perm_id=perm_id)
-                for perm_id in menu_ids
-            ]
-            self.session.add_all(role_permissions)
-            await self.session.commit()
         return role
 
-    async def update_role(self,role_data: dict,menu_ids:List[int]) -> RoleModel | None:
-        """更新角色"""
+    async def set_role_permissions(self, role_id: int, tenant_id: int | None, menu_ids: List[int]) -> tuple:
+        """按差异更新角色权限关联（不提交事务），返回 (新增权限ID, 移除权限ID)"""
+        return await sync_links(
+            self.session, RolePermissionModel,
+            RolePermissionModel.role_id, role_id,
+            RolePermissionModel.perm_id, menu_ids,
+            tenant_id,
+        )
+
+    async def update_role(self,role_data: dict,menu_ids:List[int]) -> dict | None:
+        """更新角色及权限关联（单个事务），返回角色信息及新增/移除的权限ID"""
         role_id = role_data.pop("id")
+        version = role_data.pop("version", None)
         role = await self.get_role_by_id(role_id)
         if not role:
             return None
-            
+        check_version(role, version)
+
+        # 仅权限关联变更时同样视为更新，确保版本号递增
         for key, value in role_data.items():
             setattr(role, key, value)
-            
-        await self.session.commit()
-        await self.session.refresh(role)
-        # 更新角色权限关联
+        role.update_time = datetime.now()
+
+        # 按差异更新角色权限关联，未传权限列表时保持不变
+        added, removed = [], []
         if menu_ids:
-            # 批量删除旧的关联
-            await self.session.execute(delete(RolePermissionModel).where(RolePermissionModel.role_id == role_id))
-            # 批量添加新的关联
-            role_permissions = [
-                RolePermissionModel(role_id=role.id, perm_id=perm_id)
-                for perm_id in menu_ids
-            ]
-            self.session.add_all(role_permissions)
-            await self.session.commit()
-        return role
+            added, removed = await self.set_role_permissions(role_id, role.tenant_id, menu_ids)
+        await commit_versioned(self.session)
+        await self.session.refresh(role)
+        # 角色状态或权限变更，失效该租户的权限缓存
+        permission_cache.invalidate_tenant(role.tenant_id)
+        return {**role.model_dump(), "added_menu_ids": added, "removed_menu_ids": removed}
 
     async def delete_role(self, role_id: int) -> bool:
         """逻辑删除角色"""
-        role = await self.get_role_by_id(role_id)
+        # 设置逻辑删除标志
+        role = await update_by_id(self.session, RoleModel, role_id, {"deleted": 1})
         if not role:
             return False
-            
-        # 设置逻辑删除标志
-        role.deleted = 1
         await self.session.commit()
+        permission_cache.invalidate_tenant(role.tenant_id)
         return True
     async def get_menu_by_role_id(self, role_id: int) -> List[int]:
         """根据角色ID获取菜单权限"""
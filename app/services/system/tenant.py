@@ -1,10 +1,15 @@
 from typing import List, Optional
-from sqlmodel import select, func
+from sqlmodel import select
 from app.api.vo.system.tenant import TenantPageQuery
-from app.core.db import AsyncSession
+from app.core.config import settings
+from app.core.db import AsyncSession, async_db
+from app.core.shard import PRIMARY_SHARD
 from app.core.logger import LoggerDep
 from app.models.common import PageResponse
 from app.models.system import TenantModel
+from app.utils.fieldsets import fetch_fields
+from app.utils.pagination import paginate
+from app.utils.writes import update_by_id
 
 
 class TenantService:
@@ -12,9 +17,11 @@ class TenantService:
         self.session = session
         self.logger = logger
 
-    async def lists(self) -> List[TenantModel]:
-        """获取所有租户"""
-        sql = select(TenantModel)
+    async def lists(self, fields: Optional[List[str]] = None) -> List[TenantModel] | List[dict]:
+        """获取所有租户，指定 fields 时只查询这些列"""
+        sql = select(TenantModel).execution_options(use_replica=True)
+        if fields:
+            return await fetch_fields(self.session, sql, TenantModel, fields)
         result = await self.session.execute(sql)
         return result.scalars().all()
 
@@ -32,34 +39,8 @@ class TenantService:
         if page_query.status is not None:
             query = query.where(TenantModel.status == page_query.status)
             
-        # 计算总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.session.scalar(count_query)
-        
-        # 处理空数据情况
-        if total == 0:
-            return PageResponse[TenantModel](
-                page_num=page_query.page_num,
-                page_size=page_query.page_size,
-                total=total,
-                items=[]
-            )
-        
-        # 查询分页数据
-        sql = query\
-            .offset(page_query.offset)\
-            .limit(page_query.limit)\
-            .order_by(TenantModel.create_time.desc())
-        
-        result = await self.session.execute(sql)
-        tenants = result.scalars().all()
-
-        return PageResponse[TenantModel](
-            page_num=page_query.page_num,
-            page_size=page_query.page_size,
-            total=total,
-            items=tenants
-        )
+        # 页码或游标分页
+        return await paginate(self.session, query, TenantModel, page_query)
 
     async def get_tenant_by_id(self, tenant_id: int) -> Optional[TenantModel]:
         """根据ID获取租户信息"""
@@ -87,39 +68,46 @@ class TenantService:
         return tenant
 
     async def update_tenant(self, tenant_data: dict) -> Optional[TenantModel]:
-        """更新租户信息"""
+        """更新租户信息（传入 version 时校验乐观锁）"""
         tenant_id = tenant_data.pop("id")
-        tenant = await self.get_tenant_by_id(tenant_id)
+        version = tenant_data.pop("version", None)
+        tenant = await update_by_id(self.session, TenantModel, tenant_id, tenant_data, version)
         if not tenant:
             return None
-        
-        # 更新租户基本信息
-        for key, value in tenant_data.items():
-            setattr(tenant, key, value)
-        
         await self.session.commit()
-        await self.session.refresh(tenant)
         return tenant
 
     async def delete_tenant(self, tenant_id: int) -> bool:
         """逻辑删除租户"""
-        tenant = await self.get_tenant_by_id(tenant_id)
-        if not tenant:
-            return False
-            
         # 设置逻辑删除标志
-        tenant.deleted = 1
+        if not await update_by_id(self.session, TenantModel, tenant_id, {"deleted": 1}, returning=False):
+            return False
         await self.session.commit()
         return True
 
     async def update_status(self, tenant_id: int, status: int) -> bool:
         """更新租户状态"""
-        tenant = await self.get_tenant_by_id(tenant_id)
-        if not tenant:
+        # 租户表不属于任何租户，需跳过租户过滤（停用后方可迁移分库）
+        updated = await update_by_id(
+            self.session, TenantModel, tenant_id, {"status": status},
+            returning=False, execution_options={"all_tenants": True},
+        )
+        if not updated:
             return False
-            
-        # 更新状态
-        tenant.status = status
         await self.session.commit()
-        await self.session.refresh(tenant)
         return True
+
+    async def move_to_shard(self, tenant_id: int, shard: str) -> dict:
+        """将租户迁移到指定分库（租户需先停用）"""
+        if shard != PRIMARY_SHARD and shard not in settings.shard_dsns:
+            raise ValueError(f"未配置的分库: {shard}")
+        # 租户表不属于任何租户，需跳过租户过滤
+        sql = select(TenantModel).where(TenantModel.id == tenant_id).execution_options(all_tenants=True)
+        tenant = (await self.session.execute(sql)).scalar_one_or_none()
+        if not tenant or tenant.deleted == 1:
+            raise ValueError("租户不存在")
+        if tenant.status == 0:
+            raise ValueError("请先停用租户再迁移分库")
+        moved = await async_db.move_tenant(tenant_id, shard)
+        self.logger.info("租户 {} 已迁移到分库 {}: {}", tenant_id, shard, moved)
+        return moved
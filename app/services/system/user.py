@@ -1,29 +1,91 @@
-from typing import List, Dict
-from sqlmodel import delete, select, func
-from app.api.vo.system.user import UserPageQuery
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select, update
+from app.api.vo.system.user import CreateUser, UserPageQuery
+from app.core.config import settings
 from app.core.db import AsyncSession
 from app.core.logger import LoggerDep
 from app.models.common import PageResponse
-from app.models.system import DeptModel, PostModel, UserModel, UserRoleModel
-from sqlalchemy.orm import selectinload
-from app.core.security import get_password_hash
+from app.models.system import DeptModel, PostModel, RoleModel, UserDeptModel, UserModel, UserRoleModel
+from app.core.security import get_password_hash_async
 from app.core.system_context import SystemContext
+from app.core.permission import permission_cache
+from app.core.principal import invalidate_principal
+from app.utils.fieldsets import fetch_fields
+from app.utils.pagination import paginate
+from app.utils.relations import sync_links
+from app.utils.writes import check_version, commit_versioned, update_by_id
 
 class UserService:
     def __init__(self, session: AsyncSession, logger: LoggerDep) -> None:
         self.session = session
         self.logger = logger
 
-    async def lists(self) -> List[UserModel]:
-        """获取所有用户"""
-        sql = select(UserModel)
+    async def lists(self, fields: Optional[List[str]] = None) -> List[dict]:
+        """获取所有用户，指定 fields 时只查询这些列"""
+        sql = select(UserModel).execution_options(use_replica=True)
+        if fields:
+            return await fetch_fields(self.session, sql, UserModel, fields)
         result = await self.session.execute(sql)
-        return result.scalars().all()
+        return await self._with_dept_ids(result.scalars().all())
 
-    async def get_users(self, page_query: UserPageQuery) -> PageResponse[UserModel]:
+    async def get_dept_ids(self, user_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """批量查询用户所属部门ID（走 sys_user_dept 索引）"""
+        user_ids = list(user_ids)
+        dept_ids: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return dept_ids
+        sql = select(UserDeptModel.user_id, UserDeptModel.dept_id).where(
+            UserDeptModel.user_id.in_(user_ids)
+        ).order_by(UserDeptModel.id).execution_options(use_replica=True)
+        for user_id, dept_id in (await self.session.execute(sql)).all():
+            dept_ids[user_id].append(dept_id)
+        return dept_ids
+
+    async def _with_dept_ids(self, users: List[UserModel]) -> List[dict]:
+        """用户列表附带 dept_ids（前端沿用原 JSON 字段格式）"""
+        dept_ids = await self.get_dept_ids(user.id for user in users)
+        return [{**user.model_dump(), "dept_ids": dept_ids[user.id]} for user in users]
+
+    async def set_user_depts(self, user_id: int, tenant_id: Optional[int], dept_ids: List[int]) -> tuple:
+        """按差异更新用户所属部门（不提交事务），返回 (新增部门ID, 移除部门ID)"""
+        return await sync_links(
+            self.session, UserDeptModel,
+            UserDeptModel.user_id, user_id,
+            UserDeptModel.dept_id, dept_ids,
+            tenant_id,
+        )
+
+    async def set_user_roles(self, user_id: int, tenant_id: Optional[int], role_ids: List[int]) -> tuple:
+        """
+        按差异更新用户角色关联（不提交事务），返回 (新增角色ID, 移除角色ID)
+        保留的角色维持原选中状态；选中的角色被移除时改为选中列表中的第一个角色
+        """
+        added, removed = await sync_links(
+            self.session, UserRoleModel,
+            UserRoleModel.user_id, user_id,
+            UserRoleModel.role_id, role_ids,
+            tenant_id,
+        )
+        if added or removed:
+            selected = await self.session.scalar(
+                select(UserRoleModel.id).where(UserRoleModel.user_id == user_id, UserRoleModel.status == 5)
+            )
+            if selected is None:
+                await self.session.execute(
+                    update(UserRoleModel)
+                    .where(UserRoleModel.user_id == user_id, UserRoleModel.role_id == role_ids[0])
+                    .values(status=5)  # 5表示选中状态
+                )
+        return added, removed
+
+    async def get_users(self, page_query: UserPageQuery) -> PageResponse[dict]:
         """获取用户分页列表"""
         # 构建查询条件
-        query = select(UserModel)
+        query = select(UserModel).execution_options(use_replica=True)
         
         if page_query.username:
             query = query.where(UserModel.username.contains(page_query.username))
@@ -34,182 +96,283 @@ class UserService:
         if page_query.status is not None:
             query = query.where(UserModel.status == page_query.status)
             
-        # 计算总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.session.scalar(count_query)
-        
-        # 处理空数据情况
-        if total == 0:
-            return PageResponse[UserModel](
-                page_num=page_query.page_num,
-                page_size=page_query.page_size,
-                total=total,
-                items=[]
-            )
-        
-        
-        # 查询分页数据
-        sql = query\
-            .offset(page_query.offset)\
-            .limit(page_query.limit)\
-            .order_by(UserModel.create_time.desc())
-        
-        result = await self.session.execute(sql)
-        users = result.scalars().all()
-        
-        final_users = [await self.get_user_by_id(user.id) for user in users]
+        # 页码或游标分页
+        page = await paginate(self.session, query, UserModel, page_query)
+        if not page_query.fields:  # 指定 fields 时只返回所选列，不翻译角色、部门及岗位
+            page.items = await self._hydrate_users(page.items)
+        return page
 
-        # return PageResponse[UserModel](
-        #     page_num=page_query.page_num,
-        #     page_size=page_query.page_size,
-        #     total=total,
-        #     items=final_users
-        # )
-        return {
-            "page_num": page_query.page_num,
-            "page_size": page_query.page_size,
-            "total": total,
-            "items": final_users
-        }
+    async def _hydrate_users(self, users: List[UserModel]) -> List[dict]:
+        """
+        批量翻译用户的角色、部门及岗位（与用户数量无关，固定 3 次 IN 查询），在内存中组装结果
+        """
+        user_ids = [user.id for user in users]
+        if not user_ids:
+            return []
+        roles: Dict[int, List[dict]] = {user_id: [] for user_id in user_ids}
+        depts: Dict[int, List[tuple]] = {user_id: [] for user_id in user_ids}
+
+        # 角色（按 (user_id, status) 索引顺序，与原逐个加载关系时的顺序一致）
+        sql = select(UserRoleModel.user_id, RoleModel.id, RoleModel.name, UserRoleModel.status).join(
+            RoleModel, RoleModel.id == UserRoleModel.role_id
+        ).where(UserRoleModel.user_id.in_(user_ids)).order_by(
+            UserRoleModel.user_id, UserRoleModel.status, UserRoleModel.id
+        ).execution_options(use_replica=True)
+        for user_id, role_id, name, status in (await self.session.execute(sql)).all():
+            roles[user_id].append({"id": role_id, "name": name, "status": status})
+        # 部门翻译
+        sql = select(UserDeptModel.user_id, UserDeptModel.dept_id, DeptModel.name).join(
+            DeptModel, DeptModel.id == UserDeptModel.dept_id
+        ).where(UserDeptModel.user_id.in_(user_ids)).order_by(UserDeptModel.id).execution_options(use_replica=True)
+        for user_id, dept_id, name in (await self.session.execute(sql)).all():
+            depts[user_id].append((dept_id, name))
+        # 职位翻译
+        post_ids = {user.post_id for user in users if user.post_id}
+        positions = {}
+        if post_ids:
+            sql = select(PostModel.id, PostModel.name).where(PostModel.id.in_(post_ids)).execution_options(use_replica=True)
+            positions = dict((await self.session.execute(sql)).all())
+
+        return [
+            {
+                **user.model_dump(),       # 用户基本信息
+                "dept_ids": [dept_id for dept_id, _ in depts[user.id]],  # 部门ID列表
+                "dept_names": [name for _, name in depts[user.id]],  # 部门名称列表
+                "position": positions.get(user.post_id), # 职位名称
+                "roles": roles[user.id],
+            }
+            for user in users
+        ]
 
     async def get_user_by_id(self, user_id: int):
-        """根据ID获取用户及其角色信息"""
-        # 查询用户基本信息及关联角色(结果分配给关系字段)
-        sql = (
-            select(UserModel)
-            .where(UserModel.id == user_id)
-            .options(
-                selectinload(UserModel.roles)  # 加载用户角色关联表
-                .selectinload(UserRoleModel.role)  # 加载关联的角色对象
-            )
-        )
-        result = await self.session.execute(sql)
-        user = result.scalar_one_or_none()
+        """根据ID获取用户及其角色、部门、岗位信息"""
+        sql = select(UserModel).where(UserModel.id == user_id)
+        user = (await self.session.execute(sql)).scalar_one_or_none()
         if not user:
             return None
-        # 部门翻译
-        dept_ids = user.dept_ids
-        dept_names = []
-        if dept_ids:
-            sql = select(DeptModel).where(DeptModel.id.in_(dept_ids))
-            result = await self.session.execute(sql)
-            depts = result.scalars().all()
-            dept_names = [dept.name for dept in depts]
-        # 职位翻译
-        post_id = user.post_id
-        position_name =  None
-        if post_id:
-            sql = select(PostModel).where(PostModel.id == post_id)
-            result = await self.session.execute(sql)
-            position = result.scalar_one_or_none()
-            position_name = position.name if position else None
-        return {
-            **user.model_dump(),       # 用户基本信息
-            "dept_names": dept_names,  # 部门名称列表
-            "position": position_name, # 职位名称
-            "roles": [
-                {
-                    "id": user_role.role.id,
-                    "name": user_role.role.name,
-                    "status": user_role.status
-                }
-                for user_role in user.roles
-            ]
-        }
+        return (await self._hydrate_users([user]))[0]
 
-    async def get_users_by_dept_id(self, dept_id: int) -> List[UserModel]:
-        """根据部门ID获取用户列表"""
-        sql = select(UserModel).where(UserModel.dept_ids.contains(dept_id))
+    async def get_users_by_dept_id(self, dept_id: int, include_children: bool = False) -> List[dict]:
+        """根据部门ID获取用户列表
+        :param include_children: 是否包含所有下级部门的用户
+        """
+        dept_filter = UserDeptModel.dept_id == dept_id
+        if include_children:
+            # 递归 CTE 沿 sys_dept.pid 展开子树
+            subtree = select(DeptModel.id).where(DeptModel.id == dept_id).cte("dept_subtree", recursive=True)
+            subtree = subtree.union_all(select(DeptModel.id).join(subtree, DeptModel.pid == subtree.c.id))
+            dept_filter = UserDeptModel.dept_id.in_(select(subtree.c.id))
+        sql = select(UserModel).where(
+            UserModel.id.in_(select(UserDeptModel.user_id).where(dept_filter))
+        ).order_by(UserModel.id).execution_options(use_replica=True)
         result = await self.session.execute(sql)
-        return result.scalars().all()
+        return await self._with_dept_ids(result.scalars().all())
 
     async def remove_user_from_dept(self, dept_id: int, user_id: int) -> bool:
         """从部门中移除用户"""
-        user = await self.session.get(UserModel, user_id)
-        if not user:
-            return False
-            
-        # 检查用户是否属于该部门
-        if not user.dept_ids or dept_id not in user.dept_ids:
+        result = await self.session.execute(
+            delete(UserDeptModel).where(UserDeptModel.user_id == user_id, UserDeptModel.dept_id == dept_id)
+        )
+        # 用户不属于该部门时未删除任何记录
+        if not result.rowcount:
             return False
-        
-        # 从用户的部门列表中移除指定部门
-        user.dept_ids = [d for d in user.dept_ids if d != dept_id]
-        
         await self.session.commit()
-        await self.session.refresh(user)
         return True
 
-    async def create_user(self, user: UserModel, role_ids: List[int]) -> UserModel:
-        """创建用户并关联角色"""
+    async def create_user(self, user: UserModel, role_ids: List[int], dept_ids: Optional[List[int]] = None) -> dict:
+        """创建用户并关联角色、部门，返回用户信息（附带 dept_ids）"""
         # 设置租户ID
         tenant_id = SystemContext.get_tenant_id()
         if tenant_id:
             user.tenant_id = tenant_id
+
+        # 账号在租户内唯一（逻辑删除的账号同样占用）
+        exists_sql = select(UserModel.id).where(
+            UserModel.tenant_id == user.tenant_id,
+            UserModel.username == user.username,
+        ).execution_options(include_deleted=True)
+        if (await self.session.execute(exists_sql)).first():
+            raise ValueError("用户已存在")
         
         # 添加用户到数据库
-        user.password = get_password_hash(user.password)  # 哈希密码
+        user.password = await get_password_hash_async(user.password)  # 哈希密码
         self.session.add(user)
+        await self.session.flush()
+        if dept_ids:
+            await self.set_user_depts(user.id, user.tenant_id, dept_ids)
+        # 如果提供了角色ID列表，创建用户角色关联（第一个角色默认选中）
+        if role_ids:
+            await self.set_user_roles(user.id, user.tenant_id, role_ids)
         await self.session.commit()
         await self.session.refresh(user)
-        
-        # 如果提供了角色ID列表，创建用户角色关联
-        if role_ids:
-            user_roles = [
-                UserRoleModel(user_id=user.id, role_id=role_id)
-                for role_id in role_ids
-            ]
-            # 设置默认选中用户
-            user_roles[0].status = 5 # 5表示选中状态
-            self.session.add_all(user_roles)
-            await self.session.commit()
-        
-        return user
+        return {**user.model_dump(), "dept_ids": list(dict.fromkeys(dept_ids or []))}
+
+    async def _existing_ids(self, model, ids: Iterable[int]) -> set:
+        """返回当前租户内存在的记录ID"""
+        ids = set(ids)
+        if not ids:
+            return set()
+        sql = select(model.id).where(model.id.in_(ids))
+        return set((await self.session.execute(sql)).scalars().all())
+
+    async def _existing_usernames(self, tenant_id: Optional[int], usernames: List[str]) -> set:
+        """返回租户内已占用的账号（逻辑删除的账号同样占用），按批次 IN 查询"""
+        existing = set()
+        batch_size = settings.db_bulk_insert_batch_size
+        for start in range(0, len(usernames), batch_size):
+            sql = select(UserModel.username).where(
+                UserModel.tenant_id == tenant_id,
+                UserModel.username.in_(usernames[start:start + batch_size]),
+            ).execution_options(include_deleted=True)
+            existing.update((await self.session.execute(sql)).scalars().all())
+        return existing
+
+    async def batch_create_users(self, users: List[CreateUser]) -> dict:
+        """
+        批量创建用户并关联角色、部门，逐行返回结果（部分失败不影响其他行）
+        - 账号重复、角色/部门/岗位不存在的行在写入前校验失败
+        - 密码在哈希执行池中并行计算，不阻塞事件循环
+        - 按 db_bulk_insert_batch_size 分批，每批一个事务，用户及关联表均为多行 INSERT
+        """
+        tenant_id = SystemContext.get_tenant_id()
+        results = [
+            {"index": index, "username": user.username, "success": False, "id": None, "msg": None}
+            for index, user in enumerate(users)
+        ]
+
+        # 请求内重复及已存在的账号
+        seen = set()
+        existing = await self._existing_usernames(tenant_id, list({user.username for user in users}))
+        role_ids = await self._existing_ids(RoleModel, (i for user in users for i in user.role_ids or []))
+        dept_ids = await self._existing_ids(DeptModel, (i for user in users for i in user.dept_ids or []))
+        post_ids = await self._existing_ids(PostModel, (user.post_id for user in users if user.post_id))
+        valid = []
+        for index, user in enumerate(users):
+            if user.username in existing:
+                results[index]["msg"] = "用户已存在"
+            elif user.username in seen:
+                results[index]["msg"] = "账号重复"
+            elif set(user.role_ids or []) - role_ids:
+                results[index]["msg"] = f"角色不存在: {sorted(set(user.role_ids) - role_ids)}"
+            elif set(user.dept_ids or []) - dept_ids:
+                results[index]["msg"] = f"部门不存在: {sorted(set(user.dept_ids) - dept_ids)}"
+            elif user.post_id and user.post_id not in post_ids:
+                results[index]["msg"] = "岗位不存在"
+            else:
+                valid.append(index)
+            seen.add(user.username)
+
+        # 并行哈希密码（并发度由执行池限制）
+        hashes = await asyncio.gather(*(get_password_hash_async(users[index].password) for index in valid))
+        passwords = dict(zip(valid, hashes))
 
-    async def update_user(self, user_data: dict, role_ids: List[int]) -> UserModel | None:
-        """更新用户信息及角色关联"""
+        batch_size = settings.db_bulk_insert_batch_size
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                await self._insert_user_batch(tenant_id, users, batch, passwords, results)
+            except IntegrityError:
+                # 并发创建了同名账号：回滚后排除已占用的账号重试一次
+                await self.session.rollback()
+                taken = await self._existing_usernames(tenant_id, [users[index].username for index in batch])
+                for index in batch:
+                    if users[index].username in taken:
+                        results[index]["msg"] = "用户已存在"
+                batch = [index for index in batch if users[index].username not in taken]
+                try:
+                    await self._insert_user_batch(tenant_id, users, batch, passwords, results)
+                except IntegrityError as e:
+                    await self.session.rollback()
+                    self.logger.error("批量创建用户失败: {}", e)
+                    for index in batch:
+                        results[index]["msg"] = "写入失败"
+
+        success = sum(result["success"] for result in results)
+        return {"total": len(users), "success": success, "failed": len(users) - success, "items": results}
+
+    async def _insert_user_batch(
+        self, tenant_id: Optional[int], users: List[CreateUser], batch: List[int], passwords: Dict[int, str], results: List[dict]
+    ) -> None:
+        """单个事务内多行插入一批用户及其角色、部门关联"""
+        if not batch:
+            return
+        rows = [
+            UserModel(
+                **users[index].model_dump(exclude={"role_ids", "dept_ids", "password"}),
+                password=passwords[index],
+                tenant_id=tenant_id,
+            ).model_dump(exclude={"id"})
+            for index in batch
+        ]
+        await self.session.execute(insert(UserModel), rows)
+        # 并非所有方言支持 INSERT ... RETURNING，按 (tenant_id, username) 唯一索引回查ID
+        sql = select(UserModel.username, UserModel.id).where(
+            UserModel.tenant_id == tenant_id,
+            UserModel.username.in_([row["username"] for row in rows]),
+        ).execution_options(include_deleted=True)
+        ids = dict((await self.session.execute(sql)).all())
+
+        user_roles, user_depts = [], []
+        for index in batch:
+            user, user_id = users[index], ids[users[index].username]
+            for position, role_id in enumerate(dict.fromkeys(user.role_ids or [])):
+                # 第一个角色默认选中
+                user_roles.append({"tenant_id": tenant_id, "user_id": user_id, "role_id": role_id, "status": 5 if position == 0 else 0})
+            for dept_id in dict.fromkeys(user.dept_ids or []):
+                user_depts.append({"tenant_id": tenant_id, "user_id": user_id, "dept_id": dept_id})
+        if user_roles:
+            await self.session.execute(insert(UserRoleModel), user_roles)
+        if user_depts:
+            await self.session.execute(insert(UserDeptModel), user_depts)
+        await self.session.commit()
+        for index in batch:
+            results[index].update(success=True, id=ids[users[index].username], msg=None)
+
+    async def update_user(self, user_data: dict, role_ids: List[int]) -> dict | None:
+        """更新用户信息及角色、部门关联（单个事务），返回用户信息（附带 dept_ids）及新增/移除的角色ID"""
         user_id = user_data.pop("id")
+        dept_ids = user_data.pop("dept_ids", None)
+        version = user_data.pop("version", None)
         # user = await self.get_user_by_id(user_id)
         sql = select(UserModel).where(UserModel.id == user_id)
         user = await self.session.execute(sql)
         user = user.scalars().first()
         if not user:
             return None
-        # 更新用户基本信息
+        check_version(user, version)
+        # 更新用户基本信息；仅关联变更时同样视为更新，确保版本号递增
         for key, value in user_data.items():
             setattr(user, key, value)
+        user.update_time = datetime.now()
+        if dept_ids is not None:
+            await self.set_user_depts(user_id, user.tenant_id, dept_ids)
         
-        # 处理角色关联更新
-        if role_ids is not None:  # 只有当role_ids不为None时才更新
-            # 删除现有的用户角色关联
-            await self.session.execute(
-                delete(UserRoleModel).where(UserRoleModel.user_id == user_id)
-            )
-            
-            # 添加新的用户角色关联
-            user_roles = [
-                UserRoleModel(user_id=user_id, role_id=role_id)
-                for role_id in role_ids
-            ]
-            # 设置默认选中用户
-            user_roles[0].status = 5 # 5表示选中状态
-            self.session.add_all(user_roles)
+        # 按差异更新角色关联，未传角色列表时保持不变
+        added, removed = [], []
+        if role_ids:
+            added, removed = await self.set_user_roles(user_id, user.tenant_id, role_ids)
         
-        await self.session.commit()
+        await commit_versioned(self.session)
         await self.session.refresh(user)
-        return user
+        # 用户角色变更，失效该用户的权限缓存及快照
+        permission_cache.invalidate_user(user_id)
+        invalidate_principal(user_id)
+        if dept_ids is None:
+            dept_ids = (await self.get_dept_ids([user_id]))[user_id]
+        return {
+            **user.model_dump(),
+            "dept_ids": list(dict.fromkeys(dept_ids)),
+            "added_role_ids": added,
+            "removed_role_ids": removed,
+        }
 
     async def delete_user(self, user_id: int) -> bool:
         """逻辑删除用户"""
-        sql = select(UserModel).where(UserModel.id == user_id)
-        user = await self.session.execute(sql)
-        user = user.scalars().first()
-        if not user:
-            return False
-            
         # 设置逻辑删除标志
-        user.deleted = 1
+        if not await update_by_id(self.session, UserModel, user_id, {"deleted": 1}, returning=False):
+            return False
         await self.session.commit()
+        invalidate_principal(user_id)
         return True
     
     async def switch_user_role(self, role_id: int) -> bool:
@@ -242,30 +405,26 @@ class UserService:
         target_role.status = 5   # 设置目标角色为选中状态
         
         await self.session.commit()
+        permission_cache.invalidate_user(current_role.user_id)
+        invalidate_principal(current_role.user_id)
         return True
     
     async def reset_password(self, user_id: int, new_password: str) -> bool:
         """重置用户密码"""
-        user = await self.session.get(UserModel, user_id)
-        if not user:
-            return False
-            
         # 更新密码
-        user.password = get_password_hash(new_password)
+        password = await get_password_hash_async(new_password)
+        if not await update_by_id(self.session, UserModel, user_id, {"password": password}, returning=False):
+            return False
         await self.session.commit()
-        await self.session.refresh(user)
         return True
     
     async def update_status(self, user_id: int, status: int) -> bool:
         """更新用户状态"""
-        user = await self.session.get(UserModel, user_id)
-        if not user:
-            return False
-            
         # 更新状态
-        user.status = status
+        if not await update_by_id(self.session, UserModel, user_id, {"status": status}, returning=False):
+            return False
         await self.session.commit()
-        await self.session.refresh(user)
+        invalidate_principal(user_id)
         return True
     
     
\ No newline at end of file
@@ -0,0 +1,34 @@
+from typing import List, Optional, Sequence, Union
+from sqlalchemy import Select
+from app.core.db import AsyncSession
+
+# 各实体均可选择的公共列
+BASE_FIELDS = ("id", "tenant_id", "create_time", "update_time")
+
+
+def parse_fields(value: Union[str, Sequence[str], None], allowed: Sequence[str]) -> Optional[List[str]]:
+    """
+    解析稀疏字段参数（fields=id,username 或重复传参），未指定时返回 None
+    字段不在允许列表中时抛出 ValueError
+    """
+    if value is None:
+        return None
+    values = [value] if isinstance(value, str) else value
+    fields = list(dict.fromkeys(field.strip() for item in values for field in item.split(",") if field.strip()))
+    if not fields:
+        return None
+    invalid = [field for field in fields if field not in allowed]
+    if invalid:
+        raise ValueError(f"不支持的字段: {', '.join(invalid)}，可选: {', '.join(allowed)}")
+    return fields
+
+
+def project(query: Select, model, fields: Sequence[str]) -> Select:
+    """将实体查询改为只查询指定列（保留筛选条件及执行选项）"""
+    return query.with_only_columns(*(getattr(model, field) for field in fields))
+
+
+async def fetch_fields(session: AsyncSession, query: Select, model, fields: Sequence[str]) -> List[dict]:
+    """只查询指定列，返回轻量字典（不构造 ORM 对象）"""
+    result = await session.execute(project(query, model, fields))
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,189 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Set, Tuple
+from sqlalchemy import Select, event, func, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.db import AsyncSession, filter_criteria
+from app.core.logger import logger
+from app.core.system_context import SystemContext
+from app.models.common import BasePageQuery, BaseTable, PageResponse
+from app.utils.cache import TTLCache
+from app.utils.fieldsets import project
+
+# 不属于筛选条件的分页参数
+PAGING_FIELDS = {"page_num", "page_size", "cursor", "count", "fields", "offset", "limit"}
+
+# 分页总数缓存: (表名, 租户ID, 筛选条件) -> 总数
+count_cache: TTLCache[tuple, int] = TTLCache(settings.count_cache_size, settings.count_cache_ttl)
+
+
+def encode_cursor(create_time: datetime, id: int) -> str:
+    """将最后一条记录的 (create_time, id) 编码为不透明游标"""
+    return base64.urlsafe_b64encode(f"{create_time.isoformat()}|{id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        create_time, id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(create_time), int(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("无效的分页游标") from e
+
+
+def count_cache_key(model, page_query: BasePageQuery) -> tuple:
+    """缓存键: 表名 + 当前租户 + 规范化的筛选条件（忽略空值及分页参数）"""
+    filters = tuple(sorted(
+        (name, value) for name, value in page_query.model_dump(exclude=PAGING_FIELDS).items()
+        if value is not None and value != ""
+    ))
+    return model.__tablename__, SystemContext.get_tenant_id(), filters
+
+
+def invalidate_counts(table: str, tenant_id: Optional[int] = None) -> int:
+    """失效指定表的分页总数缓存，tenant_id 为空时失效所有租户"""
+    return count_cache.evict(lambda key, _: key[0] == table and (tenant_id is None or key[1] == tenant_id))
+
+
+def _mark_written(session: Session, table: str, tenant_id: Optional[int]) -> None:
+    session.info.setdefault("count_cache_written", set()).add((table, tenant_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+    """记录本事务写入的 (表, 租户)，提交后再失效缓存"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, BaseTable):
+            _mark_written(session, obj.__tablename__, obj.tenant_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_writes(execute_state):
+    """ORM 批量 INSERT/UPDATE/DELETE 不经过 flush，按当前租户记录"""
+    if (execute_state.is_insert or execute_state.is_update or execute_state.is_delete) \
+            and execute_state.bind_mapper is not None:
+        table = execute_state.bind_mapper.local_table.name
+        _mark_written(execute_state.session, table, SystemContext.get_tenant_id())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    written: Set[tuple] = session.info.pop("count_cache_written", set())
+    for table, tenant_id in written:
+        invalidate_counts(table, tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written(session):
+    session.info.pop("count_cache_written", None)
+
+
+async def estimate_count(session: AsyncSession, query: Select, model) -> Optional[int]:
+    """
+    按执行计划估算行数（基于表统计信息，不扫描数据）
+    - PostgreSQL: EXPLAIN (FORMAT JSON) 的 Plan Rows
+    - MySQL: EXPLAIN 首行 rows * filtered%
+    - 其他方言不支持，返回 None
+    """
+    options = query.get_execution_options()
+    conn = await session.connection(bind_arguments={"mapper": model.__mapper__, "clause": query})
+    dialect = conn.dialect.name
+    if dialect not in ("postgresql", "mysql"):
+        return None
+    # 不经过会话执行，需自行附加租户/逻辑删除条件
+    compiled = query.options(*filter_criteria(options)).compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    try:
+        if dialect == "postgresql":
+            plan = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+            value = plan.scalar()
+            value = json.loads(value) if isinstance(value, str) else value
+            return int(value[0]["Plan"]["Plan Rows"])
+        row = (await conn.exec_driver_sql(f"EXPLAIN {compiled}", params)).mappings().first()
+        return int((row["rows"] or 0) * float(row["filtered"] or 100) / 100)
+    except Exception as e:
+        logger.warning("估算总数失败，改为精确统计: {}", e)
+        return None
+
+
+async def count_total(session: AsyncSession, query: Select, model, page_query: BasePageQuery) -> Tuple[int, bool]:
+    """统计总数，返回 (总数, 是否精确)；精确总数按租户及筛选条件缓存"""
+    if page_query.count == "estimate":
+        total = await estimate_count(session, query, model)
+        if total is not None:
+            return total, False
+
+    key = count_cache_key(model, page_query)
+    total = count_cache.get(key)
+    if total is None:
+        count_query = select(func.count()).select_from(query.subquery()).execution_options(**query.get_execution_options())
+        total = await session.scalar(count_query)
+        count_cache.set(key, total)
+    return total, True
+
+
+async def paginate(session: AsyncSession, query: Select, model, page_query: BasePageQuery) -> PageResponse:
+    """
+    按 (create_time DESC, id DESC) 分页
+    - 页码模式: OFFSET/LIMIT，默认统计总数
+    - 游标模式(page_query.cursor 不为 None): 以 (create_time, id) 范围条件定位，
+      走 (tenant_id, deleted, create_time) 索引，耗时与页深无关；多取一条判断是否还有下一页，默认不统计总数
+    - page_query.count 指定总数统计方式: exact / estimate / none
+    - page_query.fields 指定时只查询这些列，items 为字典（游标模式额外查询 id、create_time 用于生成游标）
+    """
+    order_by = (model.create_time.desc(), model.id.desc())
+    fields = page_query.fields
+    if fields:
+        query = project(query, model, list(dict.fromkeys(
+            [*fields, "id", "create_time"] if page_query.cursor is not None else fields
+        )))
+    count = page_query.count or ("exact" if page_query.cursor is None else "none")
+    total, total_exact = None, None
+    if count != "none":
+        total, total_exact = await count_total(session, query, model, page_query)
+
+    if page_query.cursor is None:
+        items = []
+        if total != 0 or not total_exact:  # 精确总数为 0 时无需查询数据
+            sql = query.order_by(*order_by).offset(page_query.offset).limit(page_query.limit)
+            result = await session.execute(sql)
+            items = [dict(row) for row in result.mappings()] if fields else result.scalars().all()
+        return PageResponse(
+            page_num=page_query.page_num,
+            page_size=page_query.page_size,
+            total=total,
+            total_exact=total_exact,
+            items=items,
+        )
+
+    if page_query.cursor:
+        create_time, last_id = decode_cursor(page_query.cursor)
+        # 冗余的 create_time <= :t 使范围条件可直接用于索引定位（OR 条件本身无法走索引范围扫描）
+        query = query.where(
+            model.create_time <= create_time,
+            or_(model.create_time < create_time, model.id < last_id),
+        )
+    sql = query.order_by(*order_by).limit(page_query.page_size + 1)
+    result = await session.execute(sql)
+    items = result.all() if fields else result.scalars().all()
+    next_cursor = None
+    if len(items) > page_query.page_size:
+        items = items[:page_query.page_size]
+        next_cursor = encode_cursor(items[-1].create_time, items[-1].id)
+    if fields:
+        items = [{field: row._mapping[field] for field in fields} for row in items]
+    return PageResponse(
+        page_num=page_query.page_num,
+        page_size=page_query.page_size,
+        total=total,
+        total_exact=total_exact,
+        items=items,
+        next_cursor=next_cursor,
+    )
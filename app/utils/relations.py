@@ -0,0 +1,33 @@
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import delete, insert, select
+from app.core.db import AsyncSession
+
+
+async def sync_links(
+    session: AsyncSession,
+    model,
+    owner_column,
+    owner_id: int,
+    target_column,
+    target_ids: Iterable[int],
+    tenant_id: Optional[int],
+) -> Tuple[List[int], List[int]]:
+    """
+    按差异同步关联表（如角色-权限、用户-角色），不提交事务
+    - 仅删除不再需要的关联、插入新增的关联，未变化的行保持不动
+    - 删除为单条 DELETE ... IN，插入为多行 INSERT
+    返回 (新增的目标ID, 删除的目标ID)
+    """
+    sql = select(target_column).where(owner_column == owner_id)
+    current = set((await session.execute(sql)).scalars().all())
+    target = dict.fromkeys(target_ids)  # 去重并保持顺序
+    added = [target_id for target_id in target if target_id not in current]
+    removed = sorted(current - target.keys())
+    if removed:
+        await session.execute(delete(model).where(owner_column == owner_id, target_column.in_(removed)))
+    if added:
+        await session.execute(insert(model), [
+            {"tenant_id": tenant_id, owner_column.key: owner_id, target_column.key: target_id}
+            for target_id in added
+        ])
+    return added, removed
@@ -0,0 +1,85 @@
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.db import AsyncSession
+
+
+class VersionConflictError(ValueError):
+    """乐观锁冲突: 记录在读取后已被其他请求修改"""
+
+    def __init__(self, message: str = "数据已被修改，请刷新后重试") -> None:
+        super().__init__(message)
+
+
+def check_version(record, version: Optional[int]) -> None:
+    """传入 version 时校验已加载记录的版本号，不一致时抛出 VersionConflictError"""
+    if version is not None and record.version != version:
+        raise VersionConflictError()
+
+
+async def commit_versioned(session: AsyncSession) -> None:
+    """提交事务；带版本号的记录在加载后被其他请求修改（提交时校验失败）则回滚并抛出 VersionConflictError"""
+    try:
+        await session.commit()
+    except StaleDataError as e:
+        await session.rollback()
+        raise VersionConflictError() from e
+
+
+async def update_by_id(
+    session: AsyncSession,
+    model,
+    id: int,
+    values: dict,
+    version: Optional[int] = None,
+    returning: bool = True,
+    execution_options: Optional[dict] = None,
+):
+    """
+    单条 UPDATE ... WHERE id=:id 更新记录（不提交事务）
+    - 经过 do_orm_execute 过滤器，自动限定当前租户及未删除的记录
+    - 方言支持 UPDATE ... RETURNING（PostgreSQL、SQLite）时一次往返返回更新后的记录；
+      否则按影响行数判断记录是否存在，需要返回记录时再查询一次
+    - 带 version 列的表每次更新版本号加一（与 ORM 提交时的 version_id_col 递增一致）；
+      传入 version 时仅在版本一致时更新，否则抛出 VersionConflictError
+    :param returning: 是否返回更新后的记录，为 False 时返回是否更新成功
+    :param execution_options: 附加执行选项（如 all_tenants=True 跳过租户过滤）
+    :return: 更新后的记录，记录不存在时返回 None（returning=False 时返回 bool）
+    """
+    # 不同步会话中已加载的对象（RETURNING 时由 populate_existing 刷新），避免无 RETURNING 的方言额外查询
+    options = execution_options or {}
+    sql = (
+        update(model).where(model.id == id).values(**values)
+        .execution_options(synchronize_session=False, **options)
+    )
+    versioned = "version" in model.__table__.c
+    if versioned:
+        sql = sql.values(version=model.version + 1)
+        if version is not None:
+            sql = sql.where(model.version == version)
+
+    record = None
+    conn = await session.connection(bind_arguments={"mapper": model.__mapper__, "clause": sql})
+    if returning and conn.dialect.update_returning:
+        sql = sql.returning(model).execution_options(populate_existing=True)
+        record = (await session.execute(sql)).scalar_one_or_none()
+        updated = record is not None
+    else:
+        result = await session.execute(sql)
+        updated = result.rowcount > 0
+
+    if not updated:
+        if versioned and version is not None and await session.scalar(
+            select(model.id).where(model.id == id).execution_options(**options)
+        ):
+            raise VersionConflictError()
+        return None if returning else False
+    if not returning:
+        return True
+    if record is None:
+        # 可能刚被逻辑删除，回查时不过滤已删除记录
+        sql = select(model).where(model.id == id).execution_options(
+            populate_existing=True, include_deleted=True, **options
+        )
+        record = (await session.execute(sql)).scalar_one()
+    return record
@@ -0,0 +1,307 @@
+"""
+端到端 HTTP 基准：内嵌 SQLite（ENV=bench）+ 进程内 ASGI 传输，无需外部数据库
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_http
+    python -m benchmarks.bench_http --tenants 5 --users 200 --requests 500 --concurrency 20
+    python -m benchmarks.bench_http --save-baseline benchmarks/baseline_http.json
+    python -m benchmarks.bench_http --baseline benchmarks/baseline_http.json --max-regression 0.2
+
+说明:
+- 每次运行重建 bench.db，按 init_default_tenant 的方式为每个租户生成部门、岗位、权限菜单、角色和用户
+- 依次压测 /login、/user/page（页码、游标分页及字段筛选）、/dept/tree、/menu/tree 及其他需要权限校验的接口（含 403 拒绝路径）
+- 输出各接口 p50/p95/p99 延迟、每秒请求数及平均SQL条数（取自 X-DB-Queries 响应头）
+- 指定 --baseline 时与基线对比，p95 升高或吞吐下降超过 --max-regression 比例则以退出码 1 结束
+"""
+import os
+
+os.environ.setdefault("ENV", "bench")  # 必须在导入 app 之前设置
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from sqlmodel import select
+
+from app.core.app import create_app
+from app.core.config import settings
+from app.core.db import async_db
+from app.core.security import get_password_hash_async
+from app.core.system_context import SystemContext
+from app.core.tenant_init import create_default_permissions
+from app.models.system import (
+    DeptModel, PermissionModel, PostModel, RoleModel, RolePermissionModel,
+    TenantModel, UserDeptModel, UserModel, UserRoleModel,
+)
+
+PASSWORD = "bench123"
+
+# 基准用户角色拥有的权限标识（/tenant/list 不授予，用于压测 403 路径）
+BENCH_IDENTIFIERS = [
+    "system:dept:tree",
+    "system:dept:list",
+    "system:menu:tree",
+    "system:role:list",
+    "system:post:list",
+]
+
+# (名称, 方法, 路径, 查询参数, 期望状态码)
+SCENARIOS: List[Tuple[str, str, str, Optional[dict], int]] = [
+    ("user_page", "GET", "/user/page", {"page_num": 1, "page_size": 10}, 200),
+    ("user_page_cursor", "GET", "/user/page", {"page_size": 10, "cursor": ""}, 200),
+    ("user_page_fields", "GET", "/user/page", {"page_size": 10, "fields": "id,username,nickname,status"}, 200),
+    ("dept_tree", "GET", "/dept/tree", None, 200),
+    ("menu_tree", "GET", "/menu/tree", None, 200),
+    ("role_list", "GET", "/role/list", None, 200),
+    ("post_list", "GET", "/post/list", None, 200),
+    ("forbidden", "GET", "/tenant/list", None, 403),
+]
+
+
+def reset_database() -> None:
+    """删除上次运行留下的 SQLite 文件"""
+    database = settings.async_mysql_dsn.split(":///", 1)[-1]
+    for suffix in ("", "-wal", "-shm"):
+        path = Path(database + suffix)
+        if path.exists():
+            path.unlink()
+
+
+async def seed_tenant(index: int, users: int, depts: int, menus: int, password_hash: str) -> List[Tuple[int, str]]:
+    """创建一个租户及其基础数据，返回 (租户ID, 用户名) 列表"""
+    async with async_db as session:
+        tenant = TenantModel(name=f"基准租户{index}", code=f"bench{index}", status=0)
+        session.add(tenant)
+        await session.commit()
+        tenant_id = tenant.id
+        SystemContext.set_tenant_id(tenant_id)
+
+        # 部门树（根节点 pid=0）: 每个部门随机挂在已创建的部门下
+        dept_rows: List[DeptModel] = []
+        for i in range(depts):
+            parent = random.choice(dept_rows) if dept_rows else None
+            dept = DeptModel(
+                tenant_id=tenant_id,
+                name=f"部门{i}",
+                pid=parent.id if parent else 0,
+                level=(parent.level + 1) if parent else 1,
+                sort=i,
+            )
+            session.add(dept)
+            await session.flush()
+            dept_rows.append(dept)
+        post = PostModel(tenant_id=tenant_id, name="基准岗位", sort=0, status=0)
+        session.add(post)
+        await session.commit()
+
+        # 权限菜单: 默认菜单 + 基准接口按钮 + 填充菜单
+        await create_default_permissions(session, tenant_id)
+        for identifier in BENCH_IDENTIFIERS:
+            session.add(PermissionModel(tenant_id=tenant_id, name=identifier, type=2, identifier=identifier, visible=False))
+        menu_ids = [0]
+        for i in range(menus):
+            menu = PermissionModel(tenant_id=tenant_id, pid=random.choice(menu_ids), name=f"菜单{i}", type=1, path=f"/bench/{i}", sort=i)
+            session.add(menu)
+            await session.flush()
+            menu_ids.append(menu.id)
+        role = RoleModel(tenant_id=tenant_id, name="基准角色", status=0)
+        session.add(role)
+        await session.commit()
+
+        perm_ids = (await session.execute(select(PermissionModel.id))).scalars().all()
+        session.add_all(RolePermissionModel(tenant_id=tenant_id, role_id=role.id, perm_id=perm_id) for perm_id in perm_ids)
+
+        usernames = []
+        for i in range(users):
+            username = f"t{index}u{i}"
+            user = UserModel(
+                tenant_id=tenant_id,
+                username=username,
+                password=password_hash,
+                nickname=f"用户{i}",
+                post_id=post.id,
+            )
+            session.add(user)
+            await session.flush()
+            if dept_rows:
+                session.add(UserDeptModel(tenant_id=tenant_id, user_id=user.id, dept_id=random.choice(dept_rows).id))
+            session.add(UserRoleModel(tenant_id=tenant_id, user_id=user.id, role_id=role.id, status=0))
+            usernames.append(username)
+        await session.commit()
+    return [(tenant_id, username) for username in usernames]
+
+
+async def seed(tenants: int, users: int, depts: int, menus: int) -> List[Tuple[int, str]]:
+    password_hash = await get_password_hash_async(PASSWORD)
+    accounts = []
+    for index in range(tenants):
+        accounts.extend(await seed_tenant(index, users, depts, menus, password_hash))
+    SystemContext.clear()
+    return accounts
+
+
+async def login(client: httpx.AsyncClient, tenant_id: int, username: str) -> httpx.Response:
+    return await client.post(
+        "/login",
+        data={"username": username, "password": PASSWORD},
+        headers={"X-Tenant-ID": str(tenant_id)},
+    )
+
+
+async def run_scenario(
+    send, total: int, concurrency: int, expected_status: int,
+) -> Dict[str, float]:
+    """以固定并发发送 total 个请求，统计延迟分位数与吞吐"""
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await send(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(int(response.headers.get("X-DB-Queries", 0)))
+            if response.status_code != expected_status:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "rps": round(total / elapsed, 1),
+        "queries": round(statistics.mean(queries), 1),
+    }
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    reset_database()
+    app = create_app()
+    error: Optional[BaseException] = None
+    async with app.router.lifespan_context(app):
+        # lifespan 会吞掉 yield 期间的异常，这里自行捕获并在退出后重新抛出
+        try:
+            results = await drive(app, args)
+        except Exception as e:
+            error = e
+    reset_database()
+    if error is not None:
+        raise error
+    return results
+
+
+async def drive(app, args) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    start = time.perf_counter()
+    accounts = await seed(args.tenants, args.users, args.depts, args.menus)
+    print(f"seeded {len(accounts)} users in {args.tenants} tenants ({time.perf_counter() - start:.1f}s)")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=f"http://bench{settings.api_v1_str}") as client:
+        # 登录（bcrypt 开销大，单独控制请求数），同时取得后续接口使用的令牌
+        results["login"] = await run_scenario(
+            lambda i: login(client, *accounts[i % len(accounts)]),
+            args.login_requests, args.concurrency, 200,
+        )
+        token_accounts = accounts[: args.token_users]
+        tokens = []
+        for tenant_id, username in token_accounts:
+            response = await login(client, tenant_id, username)
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+
+        for name, method, path, params, expected_status in SCENARIOS:
+            if args.only and name not in args.only:
+                continue
+
+            def send(i, method=method, path=path, params=params):
+                headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+                return client.request(method, path, params=params, headers=headers)
+
+            await run_scenario(send, args.warmup, args.concurrency, expected_status)
+            results[name] = await run_scenario(send, args.requests, args.concurrency, expected_status)
+    return results
+
+
+def report(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'endpoint':<16} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8}")
+    for name, row in results.items():
+        print(
+            f"{name:<16} {row['requests']:>8} {row['errors']:>6} {row['p50_ms']:>9.2f}"
+            f" {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['rps']:>9.1f} {row['queries']:>8.1f}"
+        )
+
+
+def check_regressions(results, baseline, max_regression: float) -> List[str]:
+    """与基线比较，返回超出阈值的项"""
+    failures = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if row["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {row['p95_ms']:.2f}ms > baseline {base['p95_ms']:.2f}ms")
+        if row["rps"] < base["rps"] * (1 - max_regression):
+            failures.append(f"{name}: {row['rps']:.1f} req/s < baseline {base['rps']:.1f} req/s")
+        if row["queries"] > base.get("queries", row["queries"]):
+            failures.append(f"{name}: {row['queries']:.1f} queries/request > baseline {base['queries']:.1f}")
+        if row["errors"]:
+            failures.append(f"{name}: {row['errors']} unexpected status codes")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--users", type=int, default=100, help="每个租户的用户数")
+    parser.add_argument("--depts", type=int, default=50, help="每个租户的部门数")
+    parser.add_argument("--menus", type=int, default=50, help="每个租户额外的菜单数")
+    parser.add_argument("--requests", type=int, default=300, help="每个接口的请求数")
+    parser.add_argument("--warmup", type=int, default=30, help="每个接口的预热请求数")
+    parser.add_argument("--login-requests", type=int, default=40)
+    parser.add_argument("--token-users", type=int, default=20, help="压测时轮换使用的登录用户数")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="只压测指定接口（login 总会执行）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--baseline", help="基线结果 JSON 文件")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的退化比例")
+    parser.add_argument("--save-baseline", help="将本次结果保存为基线")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    print(f"database={settings.async_mysql_dsn} tenants={args.tenants} users/tenant={args.users} "
+          f"requests={args.requests} concurrency={args.concurrency}")
+    results = asyncio.run(run(args))
+    report(results)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = check_regressions(results, baseline, args.max_regression)
+        if failures:
+            print("REGRESSION:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"no regression beyond {args.max_regression:.0%}")
+
+
+if __name__ == "__main__":
+    main()
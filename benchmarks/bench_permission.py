@@ -0,0 +1,99 @@
+"""
+权限判断微基准：ORM 对象遍历 vs 位图索引
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_permission
+    python -m benchmarks.bench_permission --perms 10000 --roles 1000 --grants 500 --user-roles 5
+
+说明:
+- "orm walk" 模拟原 check_permission 在查询结果上逐个遍历 role.permissions 的过程（不含数据库往返）
+- "bitset" 为 TenantPermissionIndex + UserPermissionMask 的单次位判断
+"""
+import argparse
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from app.core.permission import TenantPermissionIndex, UserPermissionMask
+
+
+def build_dataset(perm_count: int, role_count: int, grants_per_role: int, seed: int = 42):
+    rng = random.Random(seed)
+    permissions = [(perm_id, f"system:module{perm_id // 10}:op{perm_id % 10}") for perm_id in range(1, perm_count + 1)]
+    grants = []
+    for role_id in range(1, role_count + 1):
+        for perm_id in rng.sample(range(1, perm_count + 1), grants_per_role):
+            grants.append((role_id, perm_id))
+    return permissions, grants
+
+
+def build_orm_roles(permissions, grants, role_ids):
+    """构造与 selectinload 结果结构一致的对象"""
+    perm_objs = {
+        perm_id: SimpleNamespace(id=perm_id, identifier=identifier, status=0)
+        for perm_id, identifier in permissions
+    }
+    roles = {role_id: SimpleNamespace(id=role_id, permissions=[]) for role_id in role_ids}
+    for role_id, perm_id in grants:
+        if role_id in roles:
+            roles[role_id].permissions.append(SimpleNamespace(permission=perm_objs[perm_id]))
+    return list(roles.values())
+
+
+def orm_walk(roles, required_permission: str) -> bool:
+    for role in roles:
+        for role_perm in role.permissions:
+            permission = role_perm.permission
+            if permission.identifier == required_permission and permission.status == 0:
+                return True
+    return False
+
+
+def timeit(func, queries, repeat: int) -> float:
+    """返回每次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perms", type=int, default=10000, help="租户权限数量")
+    parser.add_argument("--roles", type=int, default=1000, help="租户角色数量")
+    parser.add_argument("--grants", type=int, default=500, help="每个角色拥有的权限数量")
+    parser.add_argument("--user-roles", type=int, default=5, help="用户拥有的角色数量")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    permissions, grants = build_dataset(args.perms, args.roles, args.grants)
+    user_role_ids = list(range(1, args.user_roles + 1))
+
+    start = time.perf_counter()
+    index = TenantPermissionIndex.build(permissions, grants)
+    build_ms = (time.perf_counter() - start) * 1e3
+    mask = UserPermissionMask(index, index.mask_for_roles(user_role_ids))
+
+    roles = build_orm_roles(permissions, grants, set(user_role_ids))
+    rng = random.Random(7)
+    queries = [identifier for _, identifier in rng.sample(permissions, 200)]
+
+    # 两种实现结果必须一致
+    for query in queries:
+        assert orm_walk(roles, query) == mask.has(query), query
+
+    walk_us = timeit(lambda q: orm_walk(roles, q), queries, args.repeat)
+    bit_us = timeit(mask.has, queries, args.repeat)
+    mask_bytes = sum(sys.getsizeof(m) for m in index.role_masks.values())
+
+    print(f"permissions={args.perms} roles={args.roles} grants/role={args.grants} user_roles={args.user_roles}")
+    print(f"index build        : {build_ms:10.2f} ms  (role masks {mask_bytes / 1024:.1f} KiB)")
+    print(f"orm walk per check : {walk_us:10.3f} us")
+    print(f"bitset per check   : {bit_us:10.3f} us")
+    print(f"speedup            : {walk_us / bit_us:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
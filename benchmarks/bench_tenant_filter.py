@@ -0,0 +1,107 @@
+"""
+租户/逻辑删除过滤基准：编译缓存命中率对比
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_tenant_filter
+    python -m benchmarks.bench_tenant_filter --tenants 50 --rounds 20
+
+说明:
+- "legacy" 复现旧版 before_execute 监听器: str(statement) 后拼接 text(f"tenant_id={tenant_id}")
+- "loader criteria" 为 app.core.db 中基于 do_orm_execute + with_loader_criteria 的实现
+- 命中率取自每次执行的 ExecutionContext.cache_hit
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, event, func, text
+from sqlalchemy.orm import Session, selectinload
+from sqlmodel import SQLModel, select
+
+import app.core.db  # noqa: F401  注册 do_orm_execute 过滤器
+from app.core.system_context import SystemContext
+from app.models.system import RoleModel, RolePermissionModel, UserModel, UserRoleModel
+
+
+def legacy_filter(conn, clauseelement, multiparams, params, execution_options):
+    """旧版过滤逻辑（仅用于对比）"""
+    if clauseelement is not None and hasattr(clauseelement, "whereclause"):
+        sql_str = str(clauseelement)
+        if "audit_log" in sql_str.lower():
+            return clauseelement, multiparams, params
+        if "join" in sql_str.lower():
+            return clauseelement, multiparams, params
+        tenant_id = SystemContext.get_tenant_id()
+        condition = text("deleted=0")
+        if tenant_id is not None:
+            condition = condition & text(f"tenant_id={tenant_id}")
+        if clauseelement.whereclause is not None:
+            clauseelement = clauseelement.where(clauseelement.whereclause & condition)
+        else:
+            clauseelement = clauseelement.where(condition)
+    return clauseelement, multiparams, params
+
+
+def workload():
+    """典型业务查询"""
+    page = select(UserModel).where(UserModel.username.contains("a"))
+    return [
+        select(UserModel).where(UserModel.id == 1),
+        select(func.count()).select_from(page.subquery()),
+        page.order_by(UserModel.create_time.desc()).offset(0).limit(10),
+        select(RoleModel).join(UserRoleModel).where(UserRoleModel.user_id == 1).options(
+            selectinload(RoleModel.permissions).selectinload(RolePermissionModel.permission)
+        ),
+    ]
+
+
+class CacheCounter:
+    def __init__(self, engine):
+        self.hits = 0
+        self.total = 0
+        event.listen(engine, "after_cursor_execute", self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.total += 1
+            if context.cache_hit == context.dialect.CACHE_HIT:
+                self.hits += 1
+
+
+def run(legacy: bool, tenants: int, rounds: int):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    if legacy:
+        event.listen(engine, "before_execute", legacy_filter, retval=True)
+    counter = CacheCounter(engine)
+    # 旧版模式下关闭新过滤器，只保留旧监听器
+    options = {"include_deleted": True, "all_tenants": True} if legacy else {}
+
+    start = time.perf_counter()
+    with Session(engine) as session:
+        for _ in range(rounds):
+            for tenant_id in range(1, tenants + 1):
+                SystemContext.set_tenant_id(tenant_id)
+                for statement in workload():
+                    session.execute(statement.execution_options(**options)).all()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return counter.hits, counter.total, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"tenants={args.tenants} rounds={args.rounds}")
+    for name, legacy in (("legacy", True), ("loader criteria", False)):
+        hits, total, elapsed = run(legacy, args.tenants, args.rounds)
+        print(
+            f"{name:<16}: cache hit rate {hits / total:6.1%} ({hits}/{total})"
+            f"  {elapsed / total * 1e6:8.1f} us/statement"
+        )
+
+
+if __name__ == "__main__":
+    main()
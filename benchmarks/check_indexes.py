@@ -0,0 +1,172 @@
+"""
+索引命中检查：执行真实的服务层查询，对其发出的每条 SELECT/WITH 做 EXPLAIN QUERY PLAN，
+确认热点查询走模型中声明的索引（内嵌 SQLite，无需外部数据库）
+
+用法（在项目根目录执行）:
+    python -m benchmarks.check_indexes
+    python -m benchmarks.check_indexes -v      # 输出每条语句的执行计划
+
+说明:
+- 查询经过 do_orm_execute 租户/逻辑删除过滤器，计划中包含自动追加的 tenant_id、deleted 条件
+- 期望索引按名称子串匹配（如 ix_sys_perm_tenant_deleted_ 表示任一以 tenant_id, deleted 开头的索引）
+- 任一检查项的计划中未出现期望的索引或出现全表扫描则以退出码 1 结束
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+
+import app.core.db  # noqa: F401  注册 do_orm_execute 过滤器
+from app.api.vo.system.role import RolePageQuery
+from app.api.vo.system.user import UserPageQuery
+from app.core.logger import logger
+from app.core.permission import load_tenant_index, load_user_permissions
+from app.core.principal import load_principal
+from app.core.system_context import SystemContext
+from app.models.system import (
+    DeptModel, PermissionModel, PostModel, RoleModel, RolePermissionModel, TenantModel, UserDeptModel, UserModel, UserRoleModel,
+)
+from app.services.system.dept import DeptService
+from app.services.system.menu import MenuService
+from app.services.system.post import PostService
+from app.services.system.role import RoleService
+from app.services.system.tenant import TenantService
+from app.services.system.user import UserService
+from app.utils.pagination import encode_cursor
+
+TENANT_ID = 1
+
+Check = Tuple[str, Optional[int], Callable[[AsyncSession], Awaitable], List[str]]
+
+# (名称, 租户上下文, 查询, 期望出现的索引)
+CHECKS: List[Check] = [
+    ("login", None,
+     lambda s: s.execute(select(UserModel).where(UserModel.username == "user1")),
+     ["ix_sys_user_username"]),
+    ("login_tenant", TENANT_ID,
+     lambda s: s.execute(select(UserModel).where(UserModel.username == "user1")),
+     ["uq_sys_user_tenant_username"]),
+    ("user_page", TENANT_ID,
+     lambda s: UserService(s, logger).get_users(UserPageQuery()),
+     ["ix_sys_user_tenant_deleted_create_time"]),
+    ("user_page_cursor", TENANT_ID,
+     lambda s: UserService(s, logger).get_users(UserPageQuery(cursor=encode_cursor(datetime.now(), 1))),
+     ["ix_sys_user_tenant_deleted_create_time"]),
+    ("role_page", TENANT_ID,
+     lambda s: RoleService(s, logger).get_roles(RolePageQuery()),
+     ["ix_sys_role_tenant_deleted_create_time"]),
+    ("role_menus", TENANT_ID,
+     lambda s: RoleService(s, logger).get_menu_by_role_id(1),
+     ["ix_sys_role_perm_role_perm"]),
+    ("dept_users", TENANT_ID,
+     lambda s: UserService(s, logger).get_users_by_dept_id(1, include_children=True),
+     ["ix_sys_user_dept_dept_user", "uq_sys_user_dept_user_dept"]),
+    ("dept_tree", TENANT_ID,
+     lambda s: DeptService(s, logger).get_dept_tree(),
+     ["ix_sys_dept_tenant_deleted_pid"]),
+    ("menu_tree", TENANT_ID,
+     lambda s: MenuService(s, logger).get_menu_tree(),
+     ["ix_sys_perm_tenant_deleted_"]),
+    ("post_list", TENANT_ID,
+     lambda s: PostService(s, logger).lists(),
+     ["ix_sys_post_tenant_deleted_sort"]),
+    ("permission_index", TENANT_ID,
+     lambda s: load_tenant_index(s, TENANT_ID),
+     ["ix_sys_perm_tenant_deleted_identifier", "ix_sys_role_perm_role_perm"]),
+    ("user_permissions", TENANT_ID,
+     lambda s: load_user_permissions(s, 1, TENANT_ID),
+     ["ix_sys_user_role_user_status"]),
+    ("principal", TENANT_ID,
+     lambda s: load_principal(s, 1, TENANT_ID),
+     ["ix_sys_user_role_user_status"]),
+    ("tenant_by_code", None,
+     lambda s: TenantService(s, logger).get_tenant_by_code("t1"),
+     ["ix_sys_tenant_code"]),
+    ("tenant_by_domain", None,
+     lambda s: TenantService(s, logger).get_tenant_by_domain("t1.example.com"),
+     ["ix_sys_tenant_domain"]),
+]
+
+
+def is_full_scan(detail: str) -> bool:
+    """SQLite 计划中不走索引的表扫描，如 "SCAN sys_user"（CTE 工作表的扫描不计）"""
+    words = detail.split()
+    return words[0] == "SCAN" and words[1] in SQLModel.metadata.tables and " USING " not in detail
+
+
+async def seed(session: AsyncSession) -> None:
+    """少量数据即可，SQLite 未 ANALYZE 时按索引可用性选计划"""
+    session.add(TenantModel(id=TENANT_ID, name="t1", code="t1", domain="t1.example.com"))
+    session.add(RoleModel(id=1, tenant_id=TENANT_ID, name="role"))
+    session.add(PermissionModel(id=1, tenant_id=TENANT_ID, pid=0, name="menu", identifier="system:user:list"))
+    session.add(DeptModel(id=1, tenant_id=TENANT_ID, pid=0, name="dept"))
+    session.add(PostModel(id=1, tenant_id=TENANT_ID, name="post"))
+    session.add(UserModel(id=1, tenant_id=TENANT_ID, username="user1", password="-"))
+    await session.flush()
+    session.add(UserRoleModel(tenant_id=TENANT_ID, user_id=1, role_id=1, status=5))
+    session.add(UserDeptModel(tenant_id=TENANT_ID, user_id=1, dept_id=1))
+    session.add(RolePermissionModel(tenant_id=TENANT_ID, role_id=1, perm_id=1))
+    await session.commit()
+
+
+async def run(verbose: bool) -> int:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    statements: List[Tuple[str, tuple]] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    failures = 0
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await seed(session)
+
+        for name, tenant_id, query, expected in CHECKS:
+            SystemContext.set_tenant_id(tenant_id)
+            statements.clear()
+            async with AsyncSession(engine) as session:
+                await query(session)
+                captured = list(statements)
+                plans = []
+                async with engine.connect() as conn:
+                    for statement, parameters in captured:
+                        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+                        plans.append((statement, [row[-1] for row in rows]))
+            used = " ".join(detail for _, details in plans for detail in details)
+            missing = [index for index in expected if index not in used]
+            missing += [detail for _, details in plans for detail in details if is_full_scan(detail)]
+            failures += bool(missing)
+            print(f"{'FAIL' if missing else 'ok':<4} {name:<18} {len(captured)} statements"
+                  + (f"  missing: {', '.join(missing)}" if missing else ""))
+            if verbose or missing:
+                for statement, details in plans:
+                    print("     " + " ".join(statement.split())[:160])
+                    for detail in details:
+                        print(f"       -> {detail}")
+    finally:
+        SystemContext.set_tenant_id(None)
+        await engine.dispose()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    failures = asyncio.run(run(args.verbose))
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+租户分库迁移检查：内嵌 SQLite（ENV=bench）主库 + 临时 SQLite 分库，通过 HTTP 接口执行一次真实的租户迁移
+
+用法（在项目根目录执行）:
+    python -m benchmarks.check_shard_move
+
+说明:
+- 以默认租户管理员登录，停用基准租户后调用 /tenant/move-shard 迁移到分库，再迁回主库（迁移时租户需处于停用状态）
+- 每次迁移后核对: 各表迁移行数与迁移前一致、源库不再保留该租户数据、映射已切换，
+  且重新启用后该租户用户登录仍能通过 /user/page 查到全部用户
+- 任一检查项失败则以退出码 1 结束
+"""
+import os
+
+os.environ.setdefault("ENV", "bench")  # 必须在导入 app 之前设置
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import func, select
+from sqlmodel import SQLModel
+
+from app.core.app import create_app
+from app.core.config import CONFIG, settings
+from app.core.db import async_db
+from app.core.security import password_hash_pool
+from app.core.shard import PRIMARY_SHARD
+from app.models.system import TenantModel, TenantShardModel
+from benchmarks.bench_http import login, reset_database, seed
+
+SHARD = "check"
+ADMIN = {"username": "admin", "password": "admin123"}
+DEFAULT_TENANT_ID = 1
+# 不随租户迁移的目录表
+CATALOG_TABLES = (TenantModel.__tablename__, TenantShardModel.__tablename__)
+
+failures: List[str] = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    print(f"{'ok' if ok else 'FAIL':<4} {name}" + (f"  {detail}" if detail and not ok else ""))
+    if not ok:
+        failures.append(name)
+
+
+async def tenant_rows(shard: str, tenant_id: int) -> Dict[str, int]:
+    """统计分库中该租户各表的行数"""
+    counts = {}
+    async with async_db.get_shard_engine(shard).connect() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if "tenant_id" in table.c and table.name not in CATALOG_TABLES:
+                counts[table.name] = await conn.scalar(
+                    select(func.count()).select_from(table).where(table.c.tenant_id == tenant_id)
+                )
+    return counts
+
+
+async def set_status(client: httpx.AsyncClient, headers: dict, tenant_id: int, status: int) -> None:
+    response = await client.put("/tenant/update-status", json={"id": tenant_id, "status": status}, headers=headers)
+    check(f"  {'disable' if status else 'enable'} tenant", response.json().get("success") is True, response.text)
+
+
+async def move(client: httpx.AsyncClient, headers: dict, tenant_id: int, source: str, target: str,
+               expected: Dict[str, int], username: str) -> None:
+    response = await client.post("/tenant/move-shard", json={"id": tenant_id, "shard": target}, headers=headers)
+    body = response.json()
+    check(f"move {source} -> {target}", body.get("success") is True, str(body))
+    moved = {name: count for name, count in (body.get("data") or {}).items() if count}
+    check(f"  moved rows match {source}", moved == {n: c for n, c in expected.items() if c}, f"{moved} != {expected}")
+    check(f"  {target} holds tenant rows", await tenant_rows(target, tenant_id) == expected)
+    left = {name: count for name, count in (await tenant_rows(source, tenant_id)).items() if count}
+    check(f"  {source} emptied", not left, str(left))
+    check(f"  shard map -> {target}", async_db.shard_map.shard_for(tenant_id) == target)
+
+    # 启用租户后以其用户登录，确认请求路由到新的分库；检查完再停用以便下次迁移
+    await set_status(client, headers, tenant_id, 0)
+    token = (await login(client, tenant_id, username)).json().get("access_token")
+    response = await client.get("/user/page", params={"page_size": 1}, headers={"Authorization": f"Bearer {token}"})
+    total = (response.json().get("data") or {}).get("total")
+    check(f"  tenant users readable on {target}", total == expected["sys_user"], f"total={total}")
+    await set_status(client, headers, tenant_id, 1)
+
+
+async def run() -> None:
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        # lifespan 会吞掉 yield 处抛出的异常，需在内部记录
+        try:
+            await run_checks(app)
+        except Exception as e:
+            check("unexpected error", False, repr(e))
+            raise
+
+
+async def run_checks(app) -> None:
+    accounts = await seed(1, 5, 3, 3)
+    tenant_id, username = accounts[0]
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url=f"http://check{settings.api_v1_str}"
+    ) as client:
+        response = await client.post("/login", data=ADMIN, headers={"X-Tenant-ID": str(DEFAULT_TENANT_ID)})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await client.post("/tenant/move-shard", json={"id": tenant_id, "shard": SHARD}, headers=headers)
+        check("enabled tenant rejected", response.json().get("success") is False, response.text)
+        await set_status(client, headers, tenant_id, 1)
+
+        expected = await tenant_rows(PRIMARY_SHARD, tenant_id)
+        await move(client, headers, tenant_id, PRIMARY_SHARD, SHARD, expected, username)
+        await move(client, headers, tenant_id, SHARD, PRIMARY_SHARD, expected, username)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        CONFIG["database"]["shards"] = {
+            SHARD: {"schema": "sqlite+aiosqlite", "database": str(Path(directory) / "shard.db")},
+        }
+        reset_database()
+        try:
+            asyncio.run(run())
+        finally:
+            reset_database()
+            password_hash_pool.shutdown()
+    print("all checks passed" if not failures else f"{len(failures)} checks failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()